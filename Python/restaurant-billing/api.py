@@ -0,0 +1,300 @@
+"""
+HTTP/JSON API for the Restaurant Billing System.
+
+A small WSGI app over the headless billing core, for handheld order-taking
+devices that should not each run the Streamlit UI. It is served by the
+standard library's WSGI server with one thread per request:
+
+    python api.py --host 0.0.0.0 --port 8000
+
+Endpoints
+    GET  /health
+    GET  /menu                      ETag / If-None-Match -> 304
+    POST /orders                    {"order_type", "payment_method", "discount",
+                                     "items": [{"menu_item_id", "quantity"}, ...]}
+    GET  /reports/sales             last 7 days + popular items
+    GET  /reports/summary           ?start=YYYY-MM-DD&end=YYYY-MM-DD (default today)
+    GET  /reports/daily             ?start&end
+    GET  /reports/breakdown         ?start&end&dimension=payment_method|order_type
+    GET  /reports/top-items         ?start&end&limit=10
+
+Prices and GST always come from the menu, never from the device.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import threading
+from datetime import datetime
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIServer, make_server
+
+from billing import Cart, checkout, from_paise, get_menu_items, init_database
+from billing.clock import local_today
+from billing.ingest import IngestFailed, IngestQueueFull, enable_async_ingest
+from billing.menu import menu_revision
+from billing.order_store import enable_group_commit
+from billing.reports import (
+    BREAKDOWN_DIMENSIONS,
+    daily_sales_range,
+    get_sales_report,
+    sales_breakdown,
+    sales_summary,
+    top_items_range,
+)
+
+MAX_BODY = 64 * 1024  # bytes accepted for an order
+ORDER_TYPES = ('Dine-In', 'Takeaway')
+PAYMENT_METHODS = ('Cash', 'Card', 'UPI')
+MAX_QUANTITY = 100
+
+STATUS = {
+    200: '200 OK',
+    201: '201 Created',
+    304: '304 Not Modified',
+    400: '400 Bad Request',
+    404: '404 Not Found',
+    405: '405 Method Not Allowed',
+    413: '413 Payload Too Large',
+    503: '503 Service Unavailable',
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    # numpy scalars from DataFrames
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def to_json(payload):
+    return json.dumps(payload, default=_json_default).encode('utf-8')
+
+
+# -- menu -------------------------------------------------------------------
+
+_menu_lock = threading.Lock()
+_menu_entry = None  # (menu revision, body, etag, {id: item})
+
+
+def menu_snapshot():
+    """JSON body, ETag and id index for the current menu revision"""
+    global _menu_entry
+    revision = menu_revision()
+    entry = _menu_entry
+    if entry is None or entry[0] != revision:
+        with _menu_lock:
+            entry = _menu_entry
+            if entry is None or entry[0] != revision:
+                items = get_menu_items()[['id', 'name', 'category', 'price', 'gst']].to_dict('records')
+                body = to_json(items)
+                # Content hash, so ETags stay valid across server restarts
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+                entry = _menu_entry = (revision, body, etag, {int(item['id']): item for item in items})
+    return entry[1:]
+
+
+def get_menu(environ, query):
+    body, etag, _ = menu_snapshot()
+    if etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+        return 304, b'', [('ETag', etag)]
+    return 200, body, [('ETag', etag), ('Cache-Control', 'no-cache')]
+
+
+# -- orders -----------------------------------------------------------------
+
+def _read_json(environ):
+    try:
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        raise ApiError(400, "Invalid Content-Length")
+    if length > MAX_BODY:
+        raise ApiError(413, f"Order payload is limited to {MAX_BODY} bytes")
+    try:
+        return json.loads(environ['wsgi.input'].read(length) or b'null')
+    except ValueError:
+        raise ApiError(400, "Body is not valid JSON")
+
+
+def build_cart(payload, menu_by_id):
+    """Validate an order payload and price its items from the menu"""
+    if not isinstance(payload, dict):
+        raise ApiError(400, "Expected a JSON object")
+    lines = payload.get('items')
+    if not isinstance(lines, list) or not lines:
+        raise ApiError(400, "items must be a non-empty list")
+
+    cart = Cart()
+    for line in lines:
+        try:
+            item_id = int(line['menu_item_id'])
+            quantity = int(line.get('quantity', 1))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise ApiError(400, "Each item needs an integer menu_item_id and quantity")
+        item = menu_by_id.get(item_id)
+        if item is None:
+            raise ApiError(400, f"Unknown menu item {item_id}")
+        if not 0 < quantity <= MAX_QUANTITY:
+            raise ApiError(400, f"Quantity for item {item_id} must be 1-{MAX_QUANTITY}")
+        cart.add(item_id, item['name'], float(item['price']), quantity, float(item['gst']))
+    return cart
+
+
+def post_order(environ, query):
+    payload = _read_json(environ)
+    _, _, menu_by_id = menu_snapshot()
+    cart = build_cart(payload, menu_by_id)
+
+    order_type = payload.get('order_type', 'Dine-In')
+    payment_method = payload.get('payment_method', 'Cash')
+    if order_type not in ORDER_TYPES:
+        raise ApiError(400, f"order_type must be one of {', '.join(ORDER_TYPES)}")
+    if payment_method not in PAYMENT_METHODS:
+        raise ApiError(400, f"payment_method must be one of {', '.join(PAYMENT_METHODS)}")
+    try:
+        discount = float(payload.get('discount') or 0)
+    except (TypeError, ValueError):
+        raise ApiError(400, "discount must be a number")
+    if not math.isfinite(discount):
+        raise ApiError(400, "discount must be a finite number")
+    if discount < 0:
+        raise ApiError(400, "discount cannot be negative")
+
+    try:
+        order_id, bill = checkout(cart, order_type, payment_method, discount)
+    except (IngestQueueFull, IngestFailed) as e:
+        raise ApiError(503, str(e))
+    return 201, to_json({
+        'order_id': order_id,
+        'subtotal': from_paise(bill.subtotal),
+        'gst': from_paise(bill.gst),
+        'discount': from_paise(bill.discount),
+        'total': from_paise(bill.final_total),
+    }), []
+
+
+# -- reports ----------------------------------------------------------------
+
+def _date_range(query):
+    today = local_today().isoformat()
+    start = query.get('start', [today])[0]
+    end = query.get('end', [start if 'start' in query else today])[0]
+    for value in (start, end):
+        try:
+            datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            raise ApiError(400, f"Dates must be YYYY-MM-DD, got {value!r}")
+    return start, end
+
+
+def _records(df):
+    return df.to_dict('records')
+
+
+def report_sales(environ, query):
+    daily_sales, popular_items = get_sales_report()
+    return 200, to_json({'daily_sales': _records(daily_sales), 'popular_items': _records(popular_items)}), []
+
+
+def report_summary(environ, query):
+    return 200, to_json(sales_summary(*_date_range(query))), []
+
+
+def report_daily(environ, query):
+    return 200, to_json(_records(daily_sales_range(*_date_range(query)))), []
+
+
+def report_breakdown(environ, query):
+    dimension = query.get('dimension', ['payment_method'])[0]
+    if dimension not in BREAKDOWN_DIMENSIONS:
+        raise ApiError(400, f"dimension must be one of {', '.join(BREAKDOWN_DIMENSIONS)}")
+    return 200, to_json(_records(sales_breakdown(*_date_range(query), dimension))), []
+
+
+def report_top_items(environ, query):
+    try:
+        limit = int(query.get('limit', ['10'])[0])
+    except ValueError:
+        raise ApiError(400, "limit must be an integer")
+    return 200, to_json(_records(top_items_range(*_date_range(query), max(1, min(limit, 100))))), []
+
+
+def health(environ, query):
+    return 200, to_json({'status': 'ok'}), []
+
+
+ROUTES = {
+    '/health': {'GET': health},
+    '/menu': {'GET': get_menu},
+    '/orders': {'POST': post_order},
+    '/reports/sales': {'GET': report_sales},
+    '/reports/summary': {'GET': report_summary},
+    '/reports/daily': {'GET': report_daily},
+    '/reports/breakdown': {'GET': report_breakdown},
+    '/reports/top-items': {'GET': report_top_items},
+}
+
+
+def application(environ, start_response):
+    """WSGI entry point"""
+    path = environ.get('PATH_INFO', '/').rstrip('/') or '/'
+    method = environ['REQUEST_METHOD']
+    headers = []
+    try:
+        methods = ROUTES.get(path)
+        if methods is None:
+            raise ApiError(404, f"No such endpoint: {path}")
+        handler = methods.get(method)
+        if handler is None:
+            headers.append(('Allow', ', '.join(methods)))
+            raise ApiError(405, f"{method} is not allowed on {path}")
+        status, body, extra_headers = handler(environ, parse_qs(environ.get('QUERY_STRING', '')))
+        headers.extend(extra_headers)
+    except ApiError as e:
+        status, body = e.status, to_json({'error': str(e)})
+
+    if body:
+        headers.append(('Content-Type', 'application/json'))
+    headers.append(('Content-Length', str(len(body))))
+    start_response(STATUS[status], headers)
+    return [body]
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """One thread per request, so slow devices do not block each other"""
+    daemon_threads = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the billing core as an HTTP/JSON API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--async-ingest', action='store_true',
+                        help="journal orders and write them in the background")
+    args = parser.parse_args()
+
+    init_database()
+    if args.async_ingest:
+        enable_async_ingest()
+    else:
+        # Concurrent devices share commits instead of queuing for the write lock
+        enable_group_commit()
+
+    with make_server(args.host, args.port, application, server_class=ThreadingWSGIServer) as server:
+        print(f"✅ Billing API listening on http://{args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,337 +1,302 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
-from datetime import datetime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from datetime import timedelta
+import io
 import json
 import os
 from pathlib import Path
 
-# Page configuration
-st.set_page_config(
-    page_title="Restaurant Billing System",
-    page_icon="🍽️",
-    layout="wide",
-    initial_sidebar_state="expanded"
+from billing import (
+    Cart,
+    add_menu_item,
+    checkout,
+    compute_bill,
+    delete_menu_item,
+    from_paise,
+    get_menu_by_category,
+    get_menu_items,
+    init_database,
+    make_order,
+)
+from billing.bill import DEFAULT_GST
+from billing.export import EXPORT_FORMATS, ExportUnavailable, export_history_to_tempfile
+from billing.ingest import IngestFailed, IngestQueueFull, enable_async_ingest
+from billing.menu_sync import describe_diff, export_menu, import_menu, menu_file_format
+from billing.clock import local_today, utc_timestamp
+from billing.order_store import get_router
+from billing.profiling import finish_rerun, profiled, recent_profiles, span, start_rerun
+from billing.receipts import render_pdf, render_text
+from billing.shards import enable_sharding
+from billing.reports import (
+    daily_sales_range,
+    hourly_heatmap,
+    sales_breakdown,
+    sales_summary,
+    top_items_range,
 )
 
-# Custom CSS for minimalistic design
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600&display=swap');
-    
-    .main {
-        font-family: 'Inter', sans-serif;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: #2d3748;
-    }
-    
-    .stApp {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-    }
-    
-    /* Ensure all text is visible */
-    .stMarkdown, .stText, .stWrite {
-        color: #2d3748 !important;
-    }
-    
-    /* Main content area with white background */
-    .main .block-container {
-        background: rgba(255, 255, 255, 0.95);
-        border-radius: 16px;
-        padding: 2rem;
-        margin: 1rem;
-        box-shadow: 0 8px 32px rgba(0,0,0,0.1);
-    }
-    
-    /* Sidebar styling */
-    .css-1d391kg {
-        background: rgba(255, 255, 255, 0.9);
-        border-radius: 12px;
-        margin: 1rem;
-        padding: 1rem;
-    }
-    
-    .stButton > button {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 0.5rem 1rem;
-        font-weight: 500;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(102, 126, 234, 0.4);
-    }
-    
-    .stSelectbox > div > div {
-        border-radius: 8px;
-        border: 1px solid #e1e5e9;
-        background: white;
-    }
-    
-    .stTextInput > div > div > input {
-        border-radius: 8px;
-        border: 1px solid #e1e5e9;
-        background: white;
-        color: #2d3748;
-    }
-    
-    .stNumberInput > div > div > input {
-        border-radius: 8px;
-        border: 1px solid #e1e5e9;
-        background: white;
-        color: #2d3748;
-    }
-    
-    /* Dataframe styling */
-    .stDataFrame {
-        background: white;
-        border-radius: 8px;
-        padding: 1rem;
-    }
-    
-    .metric-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 12px;
-        box-shadow: 0 4px 16px rgba(0,0,0,0.1);
-        margin: 0.5rem 0;
-        border: 1px solid #e1e5e9;
-    }
-    
-    .bill-card {
-        background: white;
-        padding: 2rem;
-        border-radius: 16px;
-        box-shadow: 0 8px 32px rgba(0,0,0,0.15);
-        margin: 1rem 0;
-        border: 1px solid #e1e5e9;
-    }
-    
-    .header-text {
-        color: #2d3748;
-        font-weight: 600;
-        margin-bottom: 1rem;
-        text-shadow: 0 1px 2px rgba(0,0,0,0.1);
-    }
-    
-    .subheader-text {
-        color: #4a5568;
-        font-weight: 500;
-        margin-bottom: 0.5rem;
-    }
-    
-    /* Chart containers */
-    .stChart {
-        background: white;
-        border-radius: 8px;
-        padding: 1rem;
-        border: 1px solid #e1e5e9;
-    }
-    
-    /* Info and success messages */
-    .stAlert {
-        background: white;
-        border-radius: 8px;
-        border: 1px solid #e1e5e9;
-    }
-    
-    /* Ensure all text elements have proper contrast */
-    p, h1, h2, h3, h4, h5, h6, span, div {
-        color: #2d3748 !important;
-    }
-    
-    /* Streamlit default elements */
-    .stMarkdown > div {
-        color: #2d3748 !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Opt in with BILLING_ASYNC_INGEST=1 to journal bills and write them in the background
+ASYNC_INGEST = os.environ.get('BILLING_ASYNC_INGEST') == '1'
+# Set both to keep this outlet's orders in month shards (see billing/shards.py)
+SHARD_ROOT = os.environ.get('BILLING_SHARD_ROOT')
+OUTLET = os.environ.get('BILLING_OUTLET')
 
-# Database setup
-def init_database():
-    conn = sqlite3.connect('restaurant.db')
-    cursor = conn.cursor()
-    
-    # Create menu table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS menu (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            category TEXT NOT NULL,
-            price REAL NOT NULL,
-            gst REAL DEFAULT 5.0
-        )
-    ''')
-    
-    # Create orders table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            order_type TEXT NOT NULL,
-            total_amount REAL NOT NULL,
-            gst_amount REAL NOT NULL,
-            discount_amount REAL DEFAULT 0,
-            payment_method TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create order_items table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS order_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            order_id INTEGER,
-            item_name TEXT NOT NULL,
-            quantity INTEGER NOT NULL,
-            price REAL NOT NULL,
-            total_price REAL NOT NULL,
-            FOREIGN KEY (order_id) REFERENCES orders (id)
-        )
-    ''')
-    
-    # Insert sample menu items if table is empty
-    cursor.execute("SELECT COUNT(*) FROM menu")
-    if cursor.fetchone()[0] == 0:
-        sample_menu = [
-            ('Margherita Pizza', 'Pizza', 299.0, 5.0),
-            ('Pepperoni Pizza', 'Pizza', 349.0, 5.0),
-            ('Chicken Burger', 'Burger', 199.0, 5.0),
-            ('Veg Burger', 'Burger', 149.0, 5.0),
-            ('Pasta Carbonara', 'Pasta', 249.0, 5.0),
-            ('Caesar Salad', 'Salad', 179.0, 5.0),
-            ('Chicken Wings', 'Appetizer', 299.0, 5.0),
-            ('French Fries', 'Appetizer', 99.0, 5.0),
-            ('Coca Cola', 'Beverage', 49.0, 5.0),
-            ('Coffee', 'Beverage', 79.0, 5.0)
-        ]
-        cursor.executemany(
-            "INSERT INTO menu (name, category, price, gst) VALUES (?, ?, ?, ?)",
-            sample_menu
-        )
-    
-    conn.commit()
-    conn.close()
-
-# Initialize database
-init_database()
+@profiled('setup_page (CSS)')
+def setup_page():
+    # Page configuration
+    st.set_page_config(
+        page_title="Restaurant Billing System",
+        page_icon="🍽️",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
 
-# Session state initialization
-if 'current_order' not in st.session_state:
-    st.session_state.current_order = []
-if 'order_type' not in st.session_state:
-    st.session_state.order_type = 'Dine-In'
+    # Custom CSS for minimalistic design
+    st.markdown("""
+    <style>
+        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600&display=swap');
+    
+        .main {
+            font-family: 'Inter', sans-serif;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: #2d3748;
+        }
+    
+        .stApp {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        }
+    
+        /* Ensure all text is visible */
+        .stMarkdown, .stText, .stWrite {
+            color: #2d3748 !important;
+        }
+    
+        /* Main content area with white background */
+        .main .block-container {
+            background: rgba(255, 255, 255, 0.95);
+            border-radius: 16px;
+            padding: 2rem;
+            margin: 1rem;
+            box-shadow: 0 8px 32px rgba(0,0,0,0.1);
+        }
+    
+        /* Sidebar styling */
+        .css-1d391kg {
+            background: rgba(255, 255, 255, 0.9);
+            border-radius: 12px;
+            margin: 1rem;
+            padding: 1rem;
+        }
+    
+        .stButton > button {
+            background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            border: none;
+            border-radius: 8px;
+            padding: 0.5rem 1rem;
+            font-weight: 500;
+            transition: all 0.3s ease;
+        }
+    
+        .stButton > button:hover {
+            transform: translateY(-2px);
+            box-shadow: 0 4px 12px rgba(102, 126, 234, 0.4);
+        }
+    
+        .stSelectbox > div > div {
+            border-radius: 8px;
+            border: 1px solid #e1e5e9;
+            background: white;
+        }
+    
+        .stTextInput > div > div > input {
+            border-radius: 8px;
+            border: 1px solid #e1e5e9;
+            background: white;
+            color: #2d3748;
+        }
+    
+        .stNumberInput > div > div > input {
+            border-radius: 8px;
+            border: 1px solid #e1e5e9;
+            background: white;
+            color: #2d3748;
+        }
+    
+        /* Dataframe styling */
+        .stDataFrame {
+            background: white;
+            border-radius: 8px;
+            padding: 1rem;
+        }
+    
+        .metric-card {
+            background: white;
+            padding: 1.5rem;
+            border-radius: 12px;
+            box-shadow: 0 4px 16px rgba(0,0,0,0.1);
+            margin: 0.5rem 0;
+            border: 1px solid #e1e5e9;
+        }
+    
+        .bill-card {
+            background: white;
+            padding: 2rem;
+            border-radius: 16px;
+            box-shadow: 0 8px 32px rgba(0,0,0,0.15);
+            margin: 1rem 0;
+            border: 1px solid #e1e5e9;
+        }
+    
+        .header-text {
+            color: #2d3748;
+            font-weight: 600;
+            margin-bottom: 1rem;
+            text-shadow: 0 1px 2px rgba(0,0,0,0.1);
+        }
+    
+        .subheader-text {
+            color: #4a5568;
+            font-weight: 500;
+            margin-bottom: 0.5rem;
+        }
+    
+        /* Chart containers */
+        .stChart {
+            background: white;
+            border-radius: 8px;
+            padding: 1rem;
+            border: 1px solid #e1e5e9;
+        }
+    
+        /* Info and success messages */
+        .stAlert {
+            background: white;
+            border-radius: 8px;
+            border: 1px solid #e1e5e9;
+        }
+    
+        /* Ensure all text elements have proper contrast */
+        p, h1, h2, h3, h4, h5, h6, span, div {
+            color: #2d3748 !important;
+        }
+    
+        /* Streamlit default elements */
+        .stMarkdown > div {
+            color: #2d3748 !important;
+        }
+    </style>
+    """, unsafe_allow_html=True)
 
-def get_menu_items():
-    conn = sqlite3.connect('restaurant.db')
-    df = pd.read_sql_query("SELECT * FROM menu ORDER BY category, name", conn)
-    conn.close()
-    return df
+@profiled()
+def init_session_state():
+    if 'current_order' not in st.session_state:
+        st.session_state.current_order = Cart()
+    if 'order_type' not in st.session_state:
+        st.session_state.order_type = 'Dine-In'
+    if 'menu_grid_version' not in st.session_state:
+        st.session_state.menu_grid_version = 0
 
-def add_to_order(item_name, price, quantity):
-    # Check if item already exists in order
-    for item in st.session_state.current_order:
-        if item['name'] == item_name:
-            item['quantity'] += quantity
-            return
-    
-    # Add new item
-    st.session_state.current_order.append({
-        'name': item_name,
-        'price': price,
-        'quantity': quantity
-    })
+def add_to_order(item_id, item_name, price, quantity, gst=DEFAULT_GST):
+    # Merges with an existing line for the same menu item in O(1)
+    st.session_state.current_order.add(item_id, item_name, price, quantity, gst)
 
-def remove_from_order(index):
-    if 0 <= index < len(st.session_state.current_order):
-        st.session_state.current_order.pop(index)
+def remove_from_order(item_id):
+    st.session_state.current_order.remove(item_id)
 
-def calculate_bill():
-    subtotal = sum(item['price'] * item['quantity'] for item in st.session_state.current_order)
-    gst_rate = 5.0  # 5% GST
-    gst_amount = subtotal * (gst_rate / 100)
-    total = subtotal + gst_amount
-    return subtotal, gst_amount, total
+def calculate_bill(discount=0.0):
+    # Exact integer-paise totals using each item's own GST rate
+    return compute_bill(st.session_state.current_order.items(), discount)
 
 def save_order(payment_method, discount=0):
-    if not st.session_state.current_order:
-        return False
-    
-    subtotal, gst_amount, total = calculate_bill()
-    final_total = total - discount
-    
-    conn = sqlite3.connect('restaurant.db')
-    cursor = conn.cursor()
-    
-    # Save order
-    cursor.execute('''
-        INSERT INTO orders (order_type, total_amount, gst_amount, discount_amount, payment_method)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (st.session_state.order_type, final_total, gst_amount, discount, payment_method))
-    
-    order_id = cursor.lastrowid
-    
-    # Save order items
-    for item in st.session_state.current_order:
-        cursor.execute('''
-            INSERT INTO order_items (order_id, item_name, quantity, price, total_price)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (order_id, item['name'], item['quantity'], item['price'], item['price'] * item['quantity']))
-    
-    conn.commit()
-    conn.close()
-    
-    # Clear current order
-    st.session_state.current_order = []
-    return order_id
+    items = st.session_state.current_order.items()
+    # One timestamp for both the stored order and the printed receipt
+    timestamp = utc_timestamp()
+    order_id, bill = checkout(
+        st.session_state.current_order,
+        st.session_state.order_type,
+        payment_method,
+        discount,
+        timestamp
+    )
+    if order_id:
+        # Rendered from what was billed; with async ingest the row may not be written yet
+        order = make_order(
+            st.session_state.order_type, items, from_paise(bill.final_total), from_paise(bill.gst),
+            payment_method, from_paise(bill.discount), timestamp
+        )
+        st.session_state.last_receipt = (order_id, render_text(dict(order, id=order_id)))
+    return order_id or False
 
-def get_sales_report():
-    conn = sqlite3.connect('restaurant.db')
-    
-    # Daily sales
-    daily_sales = pd.read_sql_query('''
-        SELECT DATE(timestamp) as date, 
-               COUNT(*) as orders,
-               SUM(total_amount) as revenue
-        FROM orders 
-        GROUP BY DATE(timestamp)
-        ORDER BY date DESC
-        LIMIT 7
-    ''', conn)
-    
-    # Most sold items
-    popular_items = pd.read_sql_query('''
-        SELECT item_name, SUM(quantity) as total_quantity, SUM(total_price) as total_revenue
-        FROM order_items
-        GROUP BY item_name
-        ORDER BY total_quantity DESC
-        LIMIT 10
-    ''', conn)
-    
-    conn.close()
-    return daily_sales, popular_items
+def count_widgets():
+    ctx = get_script_run_ctx()
+    return len(ctx.widget_ids_this_run) if ctx is not None else None
+
+def profiler_panel():
+    """Debug sidebar: where the previous rerun of this session spent its time"""
+    profile = st.session_state.get('last_profile')
+    with st.sidebar.expander("Rerun profile", expanded=True):
+        if profile is None:
+            st.caption("Interact with the app to record a rerun")
+            return
+        st.write(f"Total {profile.total_ms:.1f} ms · SQL {profile.sql_ms():.1f} ms · {profile.widgets} widgets")
+        report = profile.as_dict()
+        st.dataframe(
+            pd.DataFrame([
+                {'span': '· ' * entry['depth'] + entry['name'], 'ms': entry['ms']}
+                for entry in report['spans']
+            ]),
+            hide_index=True,
+            use_container_width=True
+        )
+        if report['sql']:
+            st.dataframe(pd.DataFrame(report['sql'][:10]), hide_index=True, use_container_width=True)
+        totals = sorted(p.total_ms for p in recent_profiles())
+        st.caption(
+            f"{len(totals)} profiled reruns in this process · "
+            f"p50 {totals[len(totals) // 2]:.1f} ms · p95 {totals[int(len(totals) * 0.95)]:.1f} ms"
+        )
 
 # Main app
 def main():
-    st.title("🍽️ Restaurant Billing System")
-    st.markdown("---")
-    
-    # Sidebar for navigation
-    page = st.sidebar.selectbox(
-        "Navigation",
-        ["📋 New Order", "📊 Reports", "🍽️ Menu Management"]
-    )
-    
-    if page == "📋 New Order":
-        new_order_page()
-    elif page == "📊 Reports":
-        reports_page()
-    elif page == "🍽️ Menu Management":
-        menu_management_page()
+    # A sample of reruns is profiled; all of them while the panel is open
+    start_rerun(force=st.session_state.get('show_profiler', False))
+    try:
+        setup_page()
+        if SHARD_ROOT and OUTLET and get_router() is None:
+            enable_sharding(SHARD_ROOT, OUTLET)
+        with span('init_database'):
+            init_database()
+        if ASYNC_INGEST:
+            # Bills are journalled and written to SQLite in the background
+            enable_async_ingest()
+        init_session_state()
+        
+        st.title("🍽️ Restaurant Billing System")
+        st.markdown("---")
+        
+        # Sidebar for navigation
+        page = st.sidebar.selectbox(
+            "Navigation",
+            ["📋 New Order", "📊 Reports", "🍽️ Menu Management"]
+        )
+        if st.sidebar.checkbox("⏱️ Rerun profiler", key="show_profiler"):
+            profiler_panel()
+        
+        if page == "📋 New Order":
+            new_order_page()
+        elif page == "📊 Reports":
+            reports_page()
+        elif page == "🍽️ Menu Management":
+            menu_management_page()
+    finally:
+        # Also runs when st.rerun() cuts the script short
+        profile = finish_rerun(widgets=count_widgets())
+        if profile is not None:
+            st.session_state.last_profile = profile
 
+@profiled()
 def new_order_page():
     col1, col2 = st.columns([2, 1])
     
@@ -345,39 +310,8 @@ def new_order_page():
             key="order_type_select"
         )
         
-        # Menu display
-        menu_df = get_menu_items()
-        
         st.markdown('<h3 class="subheader-text">Menu</h3>', unsafe_allow_html=True)
-        
-        # Group by category
-        for category in menu_df['category'].unique():
-            category_items = menu_df[menu_df['category'] == category]
-            
-            st.markdown(f"**{category}**")
-            for _, item in category_items.iterrows():
-                col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
-                
-                with col1:
-                    st.write(f"• {item['name']}")
-                with col2:
-                    st.write(f"₹{item['price']:.0f}")
-                with col3:
-                    quantity = st.number_input(
-                        "Qty",
-                        min_value=0,
-                        max_value=10,
-                        value=0,
-                        key=f"qty_{item['id']}"
-                    )
-                with col4:
-                    if st.button("Add", key=f"add_{item['id']}"):
-                        if quantity > 0:
-                            add_to_order(item['name'], item['price'], quantity)
-                            st.success(f"Added {quantity}x {item['name']}")
-                            st.rerun()
-            
-            st.markdown("---")
+        menu_picker()
     
     with col2:
         st.markdown('<h3 class="subheader-text">Current Order</h3>', unsafe_allow_html=True)
@@ -385,18 +319,18 @@ def new_order_page():
         if not st.session_state.current_order:
             st.info("No items in order")
         else:
-            subtotal, gst_amount, total = calculate_bill()
+            bill = calculate_bill()
             
             # Display order items
-            for i, item in enumerate(st.session_state.current_order):
+            for line in st.session_state.current_order:
                 col1, col2, col3 = st.columns([3, 1, 1])
                 with col1:
-                    st.write(f"{item['name']}")
+                    st.write(f"{line.name}")
                 with col2:
-                    st.write(f"x{item['quantity']}")
+                    st.write(f"x{line.quantity}")
                 with col3:
-                    if st.button("❌", key=f"remove_{i}"):
-                        remove_from_order(i)
+                    if st.button("❌", key=f"remove_{line.item_id}"):
+                        remove_from_order(line.item_id)
                         st.rerun()
             
             st.markdown("---")
@@ -404,22 +338,26 @@ def new_order_page():
             # Bill summary
             st.markdown('<div class="bill-card">', unsafe_allow_html=True)
             st.markdown("**Bill Summary**")
-            st.write(f"Subtotal: ₹{subtotal:.2f}")
-            st.write(f"GST (5%): ₹{gst_amount:.2f}")
-            st.write(f"**Total: ₹{total:.2f}**")
+            st.write(f"Subtotal: ₹{from_paise(bill.subtotal):.2f}")
+            st.write(f"GST: ₹{from_paise(bill.gst):.2f}")
+            st.write(f"**Total: ₹{from_paise(bill.total):.2f}**")
             
             # Payment section
             st.markdown("---")
             discount = st.number_input("Discount Amount", min_value=0.0, value=0.0, step=10.0)
             payment_method = st.selectbox("Payment Method", ["Cash", "Card", "UPI"])
             
-            final_total = total - discount
             if discount > 0:
-                st.write(f"**Final Total: ₹{final_total:.2f}**")
+                final_bill = calculate_bill(discount)
+                st.write(f"**Final Total: ₹{from_paise(final_bill.final_total):.2f}**")
             
             if st.button("💳 Generate Bill", type="primary"):
                 if st.session_state.current_order:
-                    order_id = save_order(payment_method, discount)
+                    try:
+                        order_id = save_order(payment_method, discount)
+                    except (IngestQueueFull, IngestFailed) as e:
+                        st.error(f"Could not save the order: {e}")
+                        order_id = None
                     if order_id:
                         st.success(f"Order #{order_id} saved successfully!")
                         st.balloons()
@@ -427,41 +365,139 @@ def new_order_page():
                 else:
                     st.error("Please add items to the order")
             st.markdown('</div>', unsafe_allow_html=True)
+        
+        if st.session_state.get('last_receipt'):
+            receipt_panel(*st.session_state.last_receipt)
+
+def receipt_panel(order_id, text):
+    """Preview and downloads for the last saved order's receipt"""
+    with st.expander(f"🧾 Receipt for order #{order_id}"):
+        st.code(text, language=None)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "🖨️ Thermal (TXT)",
+                text,
+                file_name=f"receipt-{order_id}.txt",
+                mime="text/plain"
+            )
+        with col2:
+            st.download_button(
+                "📄 PDF",
+                render_pdf(text),
+                file_name=f"receipt-{order_id}.pdf",
+                mime="application/pdf"
+            )
 
+@profiled()
+def menu_picker():
+    """Search-or-browse menu grid; only the visible items become widgets"""
+    with span('get_menu_by_category'):
+        menu_by_category = get_menu_by_category()
+    if not menu_by_category:
+        st.info("Menu is empty")
+        return
+    
+    search = st.text_input("🔍 Search menu", key="menu_search").strip()
+    if search:
+        with span('get_menu_items'):
+            menu_df = get_menu_items()
+        items = menu_df[menu_df['name'].str.contains(search, case=False, regex=False)]
+        grid_key = "search"
+    else:
+        category = st.radio(
+            "Category",
+            list(menu_by_category),
+            horizontal=True,
+            key="menu_category"
+        )
+        items = menu_by_category[category]
+        grid_key = category
+    
+    if items.empty:
+        st.info("No matching items")
+        return
+    
+    grid = items[['id', 'name', 'price', 'gst']].assign(quantity=0)
+    edited = st.data_editor(
+        grid,
+        column_config={
+            'id': None,
+            'gst': None,
+            'name': st.column_config.TextColumn("Item"),
+            'price': st.column_config.NumberColumn("Price", format="₹%.0f"),
+            'quantity': st.column_config.NumberColumn("Qty", min_value=0, max_value=10, step=1),
+        },
+        disabled=['name', 'price'],
+        hide_index=True,
+        use_container_width=True,
+        # Bumping the version resets all quantities after items are added
+        key=f"menu_grid_{grid_key}_{st.session_state.menu_grid_version}"
+    )
+    
+    if st.button("Add to Order", key="add_selected"):
+        selected = edited[edited['quantity'] > 0]
+        if selected.empty:
+            st.warning("Set a quantity for at least one item")
+            return
+        for item_id, name, price, gst, quantity in zip(
+            selected['id'], selected['name'], selected['price'], selected['gst'], selected['quantity']
+        ):
+            add_to_order(int(item_id), name, float(price), int(quantity), float(gst))
+        st.session_state.menu_grid_version += 1
+        st.rerun()
+
+@profiled()
 def reports_page():
     st.markdown('<h2 class="header-text">Sales Reports</h2>', unsafe_allow_html=True)
     
-    daily_sales, popular_items = get_sales_report()
+    # Reports are by local date (billing/clock.py); timestamps are stored in UTC
+    today = local_today()
+    date_range = st.date_input(
+        "Date Range",
+        value=(today - timedelta(days=6), today),
+        max_value=today,
+        key="report_range"
+    )
+    if len(date_range) != 2:
+        st.info("Select a start and end date")
+        return
+    start, end = date_range
+    
+    with span('report queries'):
+        summary = sales_summary(start, end)
+        today_summary = sales_summary(today, today)
+        daily_sales = daily_sales_range(start, end)
+        popular_items = top_items_range(start, end)
     
     # Summary metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("Total Orders", len(daily_sales))
+        st.metric("Total Orders", summary['orders'])
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("Total Revenue", f"₹{daily_sales['revenue'].sum():.2f}")
+        st.metric("Total Revenue", f"₹{summary['revenue']:.2f}")
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col3:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        avg_order = daily_sales['revenue'].sum() / len(daily_sales) if len(daily_sales) > 0 else 0
-        st.metric("Avg Order Value", f"₹{avg_order:.2f}")
+        st.metric("Avg Order Value", f"₹{summary['avg_order_value']:.2f}")
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col4:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("Today's Orders", daily_sales.iloc[0]['orders'] if len(daily_sales) > 0 else 0)
+        st.metric("Today's Orders", today_summary['orders'])
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Charts
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown('<h3 class="subheader-text">Daily Sales (Last 7 Days)</h3>', unsafe_allow_html=True)
+        st.markdown('<h3 class="subheader-text">Daily Sales</h3>', unsafe_allow_html=True)
         if not daily_sales.empty:
             st.line_chart(daily_sales.set_index('date')['revenue'])
         else:
@@ -474,6 +510,30 @@ def reports_page():
         else:
             st.info("No order data available")
     
+    # Breakdowns
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown('<h3 class="subheader-text">By Payment Method</h3>', unsafe_allow_html=True)
+        with span('report queries'):
+            by_payment = sales_breakdown(start, end, 'payment_method')
+        if not by_payment.empty:
+            st.bar_chart(by_payment.set_index('payment_method')['revenue'])
+        st.dataframe(by_payment, use_container_width=True, hide_index=True)
+    
+    with col2:
+        st.markdown('<h3 class="subheader-text">By Order Type</h3>', unsafe_allow_html=True)
+        with span('report queries'):
+            by_type = sales_breakdown(start, end, 'order_type')
+        if not by_type.empty:
+            st.bar_chart(by_type.set_index('order_type')['revenue'])
+        st.dataframe(by_type, use_container_width=True, hide_index=True)
+    
+    # Hourly heatmap
+    st.markdown('<h3 class="subheader-text">Orders by Weekday and Hour (Local Time)</h3>', unsafe_allow_html=True)
+    heatmap = hourly_heatmap(start, end)
+    st.dataframe(heatmap.astype(int), use_container_width=True)
+    
     # Detailed tables
     col1, col2 = st.columns(2)
     
@@ -490,15 +550,47 @@ def reports_page():
     col1, col2 = st.columns(2)
     
     with col1:
-        if st.button("📊 Export Sales Report (CSV)"):
-            daily_sales.to_csv("sales_report.csv", index=False)
-            st.success("Sales report exported as sales_report.csv")
+        st.download_button(
+            "📊 Export Sales Report (CSV)",
+            daily_sales.to_csv(index=False),
+            file_name="sales_report.csv",
+            mime="text/csv"
+        )
+    
+    with col2:
+        st.download_button(
+            "📊 Export Popular Items (CSV)",
+            popular_items.to_csv(index=False),
+            file_name="popular_items.csv",
+            mime="text/csv"
+        )
+    
+    # Full order history, streamed out of SQLite in chunks
+    st.markdown('<h3 class="subheader-text">Full Sales History</h3>', unsafe_allow_html=True)
+    col1, col2 = st.columns([1, 2])
+    
+    with col1:
+        export_format = st.selectbox("Format", list(EXPORT_FORMATS), key="history_format")
     
     with col2:
-        if st.button("📊 Export Popular Items (CSV)"):
-            popular_items.to_csv("popular_items.csv", index=False)
-            st.success("Popular items exported as popular_items.csv")
+        if st.button("📦 Prepare History Export"):
+            # Offered for this run only and never copied into session_state,
+            # so Streamlit releases the bytes on the next rerun
+            extension, mime = EXPORT_FORMATS[export_format]
+            try:
+                with export_history_to_tempfile(export_format) as export_file:
+                    data = export_file.read()
+            except ExportUnavailable as e:
+                st.error(str(e))
+            else:
+                st.download_button(
+                    "⬇️ Download Sales History",
+                    data,
+                    file_name=f"sales_history.{extension}",
+                    mime=mime
+                )
 
+@profiled()
 def menu_management_page():
     st.markdown('<h2 class="header-text">Menu Management</h2>', unsafe_allow_html=True)
     
@@ -518,14 +610,7 @@ def menu_management_page():
     
     if st.button("➕ Add Item"):
         if new_name and new_price > 0:
-            conn = sqlite3.connect('restaurant.db')
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO menu (name, category, price, gst) VALUES (?, ?, ?, ?)",
-                (new_name, new_category, new_price, new_gst)
-            )
-            conn.commit()
-            conn.close()
+            add_menu_item(new_name, new_category, new_price, new_gst)
             st.success(f"Added {new_name} to menu")
             st.rerun()
         else:
@@ -535,21 +620,49 @@ def menu_management_page():
     
     # Current menu
     st.markdown('<h3 class="subheader-text">Current Menu</h3>', unsafe_allow_html=True)
-    menu_df = get_menu_items()
+    with span('get_menu_items'):
+        menu_df = get_menu_items()
     st.dataframe(menu_df, use_container_width=True)
     
     # Delete item
     st.markdown('<h3 class="subheader-text">Delete Menu Item</h3>', unsafe_allow_html=True)
-    item_to_delete = st.selectbox("Select item to delete", menu_df['name'].tolist())
-    
-    if st.button("🗑️ Delete Item"):
-        conn = sqlite3.connect('restaurant.db')
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM menu WHERE name = ?", (item_to_delete,))
-        conn.commit()
-        conn.close()
+    item_ids = dict(zip(menu_df['name'], menu_df['id'].tolist()))
+    item_to_delete = st.selectbox("Select item to delete", list(item_ids))
+    
+    if st.button("🗑️ Delete Item") and item_to_delete is not None:
+        # Retired, not removed: past orders keep their menu_item_id
+        delete_menu_item(item_ids[item_to_delete])
         st.success(f"Deleted {item_to_delete}")
         st.rerun()
+    
+    # Bulk import / export
+    st.markdown('<h3 class="subheader-text">Bulk Import / Export</h3>', unsafe_allow_html=True)
+    uploaded = st.file_uploader("Menu file (CSV or JSON)", type=["csv", "json"])
+    
+    if uploaded is not None:
+        keep_missing = st.checkbox("Keep items that are not in the file")
+        try:
+            fmt = menu_file_format(uploaded.name)
+            uploaded.seek(0)
+            diff = import_menu(uploaded, fmt, keep_missing, dry_run=True)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.info(f"Changes: {describe_diff(diff)}")
+            if any(diff) and st.button("📥 Apply Menu Import"):
+                uploaded.seek(0)
+                diff = import_menu(uploaded, fmt, keep_missing)
+                st.success(f"Menu updated: {describe_diff(diff)}")
+                st.rerun()
+    
+    export_buffer = io.BytesIO()
+    export_menu(export_buffer)
+    st.download_button(
+        "⬇️ Export Menu (CSV)",
+        export_buffer.getvalue(),
+        file_name="menu.csv",
+        mime="text/csv"
+    )
 
 if __name__ == "__main__":
     main()
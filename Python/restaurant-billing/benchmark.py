@@ -0,0 +1,258 @@
+"""
+Benchmark harness for the Restaurant Billing System.
+
+Builds a scratch database with a synthetic menu and order history, then
+measures:
+  - menu load latency (cold and cached)
+  - Reports query latency as the history grows (rollups vs. full scans)
+  - order commit throughput with concurrent writers (plain and group commit)
+
+Results are printed (or written) as JSON so runs can be compared between
+releases:
+
+    python benchmark.py --menu-items 500 --orders 200000 --writers 8
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from billing import database, order_store
+from billing.clock import LOCAL_DATE_SQL, TIMESTAMP_FORMAT
+from billing.menu import get_menu_items, invalidate_menu
+from billing.reports import get_sales_report
+from billing.schema import init_database
+
+CATEGORIES = ['Pizza', 'Burger', 'Pasta', 'Salad', 'Appetizer', 'Beverage', 'Dessert', 'Main Course']
+ORDER_TYPES = ['Dine-In', 'Takeaway']
+PAYMENT_METHODS = ['Cash', 'Card', 'UPI']
+GST_RATES = [5.0, 12.0, 18.0]
+HISTORY_BATCH = 2000  # orders per transaction while generating history
+
+
+def percentiles(samples):
+    """Summarise a list of durations (seconds) in milliseconds"""
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p50_ms': round(pick(0.50), 3),
+        'p95_ms': round(pick(0.95), 3),
+        'p99_ms': round(pick(0.99), 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def synthesize_menu(rng, size):
+    with database.get_connection() as conn:
+        conn.execute("DELETE FROM menu")
+        conn.executemany(
+            "INSERT INTO menu (name, category, price, gst) VALUES (?, ?, ?, ?)",
+            [
+                (f"Item {i:05d}", rng.choice(CATEGORIES), float(rng.randrange(49, 999)), rng.choice(GST_RATES))
+                for i in range(size)
+            ]
+        )
+    invalidate_menu()
+    return get_menu_items()[['id', 'name', 'price', 'gst']].to_dict('records')
+
+
+def random_order(rng, menu, timestamp=None):
+    lines = rng.sample(menu, k=min(len(menu), rng.randint(1, 6)))
+    items = [
+        {'menu_item_id': line['id'], 'name': line['name'], 'price': line['price'],
+         'quantity': rng.randint(1, 4), 'gst': line['gst']}
+        for line in lines
+    ]
+    subtotal = sum(item['price'] * item['quantity'] for item in items)
+    gst = round(sum(item['price'] * item['quantity'] * item['gst'] / 100 for item in items), 2)
+    return order_store.make_order(
+        rng.choice(ORDER_TYPES), items, round(subtotal + gst, 2), gst,
+        rng.choice(PAYMENT_METHODS), timestamp=timestamp
+    )
+
+
+def grow_history(rng, menu, count, days):
+    """Append `count` orders spread uniformly over the last `days` days"""
+    start = datetime.utcnow() - timedelta(days=days)  # stored timestamps are UTC
+    span = days * 86400
+    remaining = count
+    while remaining > 0:
+        batch_size = min(HISTORY_BATCH, remaining)
+        offsets = sorted(rng.randrange(span) for _ in range(batch_size))
+        batch = [
+            random_order(rng, menu, (start + timedelta(seconds=offset)).strftime(TIMESTAMP_FORMAT))
+            for offset in offsets
+        ]
+        order_store.commit_orders(batch)
+        remaining -= batch_size
+
+
+def full_scan_report():
+    """The pre-rollup report queries, kept as a baseline"""
+    with database.get_connection() as conn:
+        conn.execute(f'''
+            SELECT {LOCAL_DATE_SQL}, COUNT(*), SUM(total_amount)
+            FROM orders GROUP BY 1 ORDER BY 1 DESC LIMIT 7
+        ''').fetchall()
+        conn.execute('''
+            SELECT item_name, SUM(quantity) AS q, SUM(total_price)
+            FROM order_items GROUP BY item_name ORDER BY q DESC LIMIT 10
+        ''').fetchall()
+
+
+def bench_menu_load(repeat):
+    def cold():
+        invalidate_menu()
+        get_menu_items()
+
+    return {
+        'cold': percentiles(timed(cold, repeat)),
+        'cached': percentiles(timed(get_menu_items, repeat * 10)),
+    }
+
+
+def bench_reports(rng, menu, total_orders, steps, days, repeat):
+    results = []
+    step_size = max(1, total_orders // steps)
+    generated = 0
+    while generated < total_orders:
+        chunk = min(step_size, total_orders - generated)
+        started = time.perf_counter()
+        grow_history(rng, menu, chunk, days)
+        generated += chunk
+        results.append({
+            'orders': generated,
+            'generation_orders_per_sec': round(chunk / (time.perf_counter() - started), 1),
+            'sales_report': percentiles(timed(get_sales_report, repeat)),
+            'full_scan_baseline': percentiles(timed(full_scan_report, max(1, repeat // 5))),
+        })
+    return results
+
+
+def bench_commits(rng, menu, writers, orders_per_writer, group_commit):
+    if group_commit:
+        order_store.enable_group_commit()
+
+    # Pre-build payloads so only commit time is measured
+    payloads = [[random_order(rng, menu) for _ in range(orders_per_writer)] for _ in range(writers)]
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(writers + 1)
+
+    def writer(orders):
+        local = []
+        barrier.wait()
+        for order in orders:
+            start = time.perf_counter()
+            try:
+                order_store.commit_order(order)
+            except sqlite3.Error as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=writer, args=(orders,)) for orders in payloads]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if group_commit:
+        order_store.disable_group_commit()
+
+    return {
+        'writers': writers,
+        'group_commit': group_commit,
+        'orders': len(latencies),
+        'errors': len(errors),
+        'orders_per_sec': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'latency': percentiles(latencies) if latencies else None,
+    }
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix='billing-bench-')
+    db_path = os.path.join(workdir, 'bench.db')
+    previous_path = database.get_default_path()
+    database.set_default_path(db_path)
+    try:
+        init_database()
+        menu = synthesize_menu(rng, args.menu_items)
+        results = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'environment': {
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+            },
+            'parameters': vars(args),
+            'menu_load': bench_menu_load(args.repeat),
+            'reports': bench_reports(rng, menu, args.orders, args.steps, args.days, args.repeat),
+            'order_commit': [
+                bench_commits(rng, menu, args.writers, args.orders_per_writer, group_commit=False),
+                bench_commits(rng, menu, args.writers, args.orders_per_writer, group_commit=True),
+            ],
+        }
+    finally:
+        database.close_all()
+        database.set_default_path(previous_path)
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the restaurant billing order path")
+    parser.add_argument('--menu-items', type=int, default=300, help="synthetic menu size")
+    parser.add_argument('--orders', type=int, default=50000, help="historical orders to generate")
+    parser.add_argument('--steps', type=int, default=5, help="report measurements while history grows")
+    parser.add_argument('--days', type=int, default=365, help="days the history is spread over")
+    parser.add_argument('--writers', type=int, default=8, help="concurrent order writers")
+    parser.add_argument('--orders-per-writer', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20, help="samples per latency measurement")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Benchmark results written to {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Headless billing core for the Restaurant Billing System.
+
+Everything needed to price, persist and report on orders lives here with no
+Streamlit dependency, so it can be used from batch jobs, scripts, tests and
+load generators as well as from the Streamlit UI in app.py.
+"""
+
+from .bill import BillLines, BillTotals, compute_bill, from_paise, to_paise
+from .cart import Cart, CartLine
+from .database import get_connection
+from .menu import (
+    add_menu_item,
+    delete_menu_item,
+    get_menu_by_category,
+    get_menu_items,
+    invalidate_menu,
+)
+from .order_store import checkout, commit_order, commit_orders, make_order
+from .reports import get_sales_report
+from .schema import init_database
+
+__all__ = [
+    'BillLines',
+    'BillTotals',
+    'Cart',
+    'CartLine',
+    'add_menu_item',
+    'checkout',
+    'commit_order',
+    'commit_orders',
+    'compute_bill',
+    'delete_menu_item',
+    'from_paise',
+    'get_connection',
+    'get_menu_by_category',
+    'get_menu_items',
+    'get_sales_report',
+    'init_database',
+    'invalidate_menu',
+    'make_order',
+    'to_paise',
+]
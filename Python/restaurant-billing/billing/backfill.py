@@ -0,0 +1,119 @@
+"""
+menu_item_id backfill for the Restaurant Billing System.
+
+Order lines written before order_items.menu_item_id existed only carry the
+item name. This tool links them to menu ids in small batches, each in its
+own short BEGIN IMMEDIATE transaction, and folds every migrated batch into
+the id-keyed item rollups. Tills keep committing orders between batches, so
+it can be run against a live database:
+
+    python -m billing.backfill [--batch-size 2000] [--pause 0.05]
+
+Names that are no longer on the menu are added as retired (active = 0)
+menu items in an 'Archived' category, so their history stays reportable.
+"""
+
+import argparse
+import time
+
+from .clock import LOCAL_MODIFIER
+from .database import get_connection
+from .menu import invalidate_menu, resolve_menu_ids
+from .schema import add_item_rollups, init_database
+
+BACKFILL_BATCH_SIZE = 2000
+BACKFILL_PAUSE = 0.05  # seconds between batches, leaving the write lock free
+ARCHIVED_CATEGORY = 'Archived'
+
+SELECT_UNLINKED = f'''
+    SELECT i.id, i.item_name, i.quantity, i.total_price, DATE(o.timestamp, {LOCAL_MODIFIER})
+    FROM order_items i
+    LEFT JOIN orders o ON o.id = i.order_id
+    WHERE i.menu_item_id IS NULL AND i.id > ?
+    ORDER BY i.id
+    LIMIT ?
+'''
+
+
+def archive_unknown_items(conn):
+    """Add retired menu items for names that only exist in order history"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        cursor = conn.execute('''
+            INSERT INTO menu (name, category, price, active)
+            SELECT item_name, ?, MAX(price), 0
+            FROM order_items
+            WHERE menu_item_id IS NULL
+              AND item_name NOT IN (SELECT name FROM menu)
+            GROUP BY item_name
+        ''', (ARCHIVED_CATEGORY,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return cursor.rowcount
+
+
+def backfill_batch(conn, after_id, batch_size):
+    """Link one batch of lines after `after_id`; returns (lines seen, last id)"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(SELECT_UNLINKED, (after_id, batch_size)).fetchall()
+        if not rows:
+            conn.rollback()
+            return 0, after_id
+
+        menu_ids = resolve_menu_ids(conn, [row[1] for row in rows])
+        linked = [(menu_ids[row[1]],) + row for row in rows if row[1] in menu_ids]
+        conn.executemany(
+            "UPDATE order_items SET menu_item_id = ? WHERE id = ?",
+            [(menu_item_id, line_id) for menu_item_id, line_id, *_ in linked]
+        )
+        add_item_rollups(conn.cursor(), [
+            (date, menu_item_id, quantity, total_price)
+            for menu_item_id, _, _, quantity, total_price, date in linked
+            if date is not None  # orphaned line without an order header
+        ])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows), rows[-1][0]
+
+
+def backfill_menu_item_ids(batch_size=BACKFILL_BATCH_SIZE, pause=BACKFILL_PAUSE, progress=None):
+    """Link every legacy order line to its menu item; returns lines processed"""
+    with get_connection() as conn:
+        archived = archive_unknown_items(conn)
+    if archived:
+        invalidate_menu()
+
+    processed = 0
+    last_id = 0
+    while True:
+        with get_connection() as conn:
+            count, last_id = backfill_batch(conn, last_id, batch_size)
+        if not count:
+            return processed
+        processed += count
+        if progress:
+            progress(processed)
+        time.sleep(pause)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Link legacy order lines to menu item ids")
+    parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH_SIZE, help="order lines per transaction")
+    parser.add_argument('--pause', type=float, default=BACKFILL_PAUSE, help="seconds to sleep between batches")
+    args = parser.parse_args()
+
+    init_database()
+    processed = backfill_menu_item_ids(
+        args.batch_size, args.pause,
+        progress=lambda done: print(f"   {done} order lines linked", end='\r')
+    )
+    print(f"✅ Linked {processed} order lines to menu items")
+
+
+if __name__ == "__main__":
+    main()
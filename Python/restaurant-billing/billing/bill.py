@@ -0,0 +1,78 @@
+"""
+Bill engine for the Restaurant Billing System.
+
+Money is handled as integer paise and GST rates as integer basis points
+(5% = 500), so totals are exact and only converted to rupees for display
+and storage. Line items are held in numpy columns and the whole bill is
+computed in one vectorized pass, using each item's own GST rate.
+"""
+
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+DEFAULT_GST = 5.0  # percent, used when an item carries no rate
+
+BillTotals = namedtuple('BillTotals', ['subtotal', 'gst', 'total', 'discount', 'final_total'])
+
+
+def to_paise(amount):
+    """Rupees (float/str/Decimal) -> integer paise, rounding half up"""
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_paise(paise):
+    """Integer paise -> rupees as a float with two exact decimals"""
+    return round(int(paise) / 100, 2)
+
+
+def to_basis_points(rate):
+    """GST percentage -> integer basis points (5.0 -> 500)"""
+    return int((Decimal(str(rate)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+class BillLines:
+    """Column-oriented line items: unit price (paise), quantity, GST (bp)"""
+
+    __slots__ = ('prices', 'quantities', 'gst_rates')
+
+    def __init__(self, prices, quantities, gst_rates):
+        self.prices = np.asarray(prices, dtype=np.int64)
+        self.quantities = np.asarray(quantities, dtype=np.int64)
+        self.gst_rates = np.asarray(gst_rates, dtype=np.int64)
+
+    @classmethod
+    def from_items(cls, items):
+        """Build from {'price', 'quantity', 'gst'} dicts (prices in rupees)"""
+        count = len(items)
+        prices = np.fromiter((to_paise(item['price']) for item in items), dtype=np.int64, count=count)
+        quantities = np.fromiter((item['quantity'] for item in items), dtype=np.int64, count=count)
+        gst_rates = np.fromiter(
+            (to_basis_points(item.get('gst', DEFAULT_GST)) for item in items),
+            dtype=np.int64,
+            count=count
+        )
+        return cls(prices, quantities, gst_rates)
+
+    def __len__(self):
+        return len(self.prices)
+
+    def line_totals(self):
+        return self.prices * self.quantities
+
+    def totals(self, discount=0):
+        """Compute the bill in paise; `discount` is in paise"""
+        line_totals = self.line_totals()
+        subtotal = int(line_totals.sum())
+        # GST summed at full precision (paise x bp), rounded once at the end
+        gst_scaled = int((line_totals * self.gst_rates).sum())
+        gst = (gst_scaled + 5000) // 10000
+        total = subtotal + gst
+        discount = min(int(discount), total)
+        return BillTotals(subtotal, gst, total, discount, total - discount)
+
+
+def compute_bill(items, discount=0.0):
+    """Price a list of order item dicts; returns BillTotals in paise"""
+    return BillLines.from_items(items).totals(to_paise(discount))
@@ -0,0 +1,74 @@
+"""
+Order cart for the Restaurant Billing System.
+
+Lines are kept in a dict keyed by menu item id (insertion ordered), so
+adding, incrementing and removing an item are O(1) and each line has a
+stable key for its Streamlit widgets.
+"""
+
+from .bill import DEFAULT_GST
+
+
+class CartLine:
+    """One menu item in the current order"""
+
+    __slots__ = ('item_id', 'name', 'price', 'quantity', 'gst')
+
+    def __init__(self, item_id, name, price, quantity, gst=DEFAULT_GST):
+        self.item_id = item_id
+        self.name = name
+        self.price = price
+        self.quantity = quantity
+        self.gst = gst
+
+    def as_dict(self):
+        return {
+            'menu_item_id': self.item_id,
+            'name': self.name,
+            'price': self.price,
+            'quantity': self.quantity,
+            'gst': self.gst,
+        }
+
+
+class Cart:
+    """Ordered mapping of menu item id -> CartLine"""
+
+    def __init__(self):
+        self._lines = {}
+
+    def add(self, item_id, name, price, quantity, gst=DEFAULT_GST):
+        """Add a new line or increase the quantity of an existing one"""
+        line = self._lines.get(item_id)
+        if line is None:
+            self._lines[item_id] = CartLine(item_id, name, price, quantity, gst)
+        else:
+            line.quantity += quantity
+
+    def set_quantity(self, item_id, quantity):
+        if quantity <= 0:
+            self.remove(item_id)
+        elif item_id in self._lines:
+            self._lines[item_id].quantity = quantity
+
+    def remove(self, item_id):
+        self._lines.pop(item_id, None)
+
+    def clear(self):
+        self._lines.clear()
+
+    def get(self, item_id):
+        return self._lines.get(item_id)
+
+    def items(self):
+        """Lines as plain dicts, the shape used by bill.py and order_store.py"""
+        return [line.as_dict() for line in self._lines.values()]
+
+    def __iter__(self):
+        return iter(self._lines.values())
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __contains__(self, item_id):
+        return item_id in self._lines
@@ -0,0 +1,68 @@
+"""
+Business-day clock for the Restaurant Billing System.
+
+Order timestamps are stored in UTC, in SQLite's CURRENT_TIMESTAMP format.
+Reports bucket them by the restaurant's local day and hour instead, so a
+late dinner service does not spill into the next UTC day. The local time
+is UTC + UTC_OFFSET_MINUTES: India (+05:30) unless the
+BILLING_UTC_OFFSET_MINUTES environment variable says otherwise, e.g.
+-300 for UTC-05:00. Changing it rebuilds the rollups on the next start
+(see schema.py).
+"""
+
+import os
+from datetime import date, datetime, timedelta
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+UTC_OFFSET_MINUTES = int(os.environ.get('BILLING_UTC_OFFSET_MINUTES', 330))
+UTC_OFFSET = timedelta(minutes=UTC_OFFSET_MINUTES)
+
+# SQLite date/time modifier turning a stored UTC timestamp into local time,
+# e.g. DATE(timestamp, '+330 minutes')
+LOCAL_MODIFIER = f"'{UTC_OFFSET_MINUTES:+d} minutes'"
+LOCAL_DATE_SQL = f"DATE(timestamp, {LOCAL_MODIFIER})"
+LOCAL_HOUR_SQL = f"CAST(strftime('%H', timestamp, {LOCAL_MODIFIER}) AS INTEGER)"
+
+
+def utc_timestamp():
+    # Same format and clock as SQLite's CURRENT_TIMESTAMP
+    return datetime.utcnow().strftime(TIMESTAMP_FORMAT)
+
+
+def local_today():
+    """Today's date where the restaurant is"""
+    return (datetime.utcnow() + UTC_OFFSET).date()
+
+
+def local_bucket(timestamp):
+    """(local 'YYYY-MM-DD', local hour) for a stored UTC timestamp"""
+    local = datetime.fromisoformat(timestamp) + UTC_OFFSET
+    return local.strftime('%Y-%m-%d'), local.hour
+
+
+def utc_bounds(start, end=None):
+    """UTC timestamps [from, to) covering local days start..end (inclusive)"""
+    if isinstance(start, str):
+        start = date.fromisoformat(start)
+    if end is None:
+        end = start
+    elif isinstance(end, str):
+        end = date.fromisoformat(end)
+    first = datetime.combine(start, datetime.min.time()) - UTC_OFFSET
+    last = datetime.combine(end + timedelta(days=1), datetime.min.time()) - UTC_OFFSET
+    return first.strftime(TIMESTAMP_FORMAT), last.strftime(TIMESTAMP_FORMAT)
+
+
+def utc_months(start=None, end=None):
+    """First and last UTC month ('YYYY-MM') holding orders of local days start..end
+
+    Either end may be None (unbounded). Used to pick month shards, which are
+    split by the UTC timestamp.
+    """
+    first = last = None
+    if start:
+        first = utc_bounds(start)[0][:7]
+    if end:
+        last_second = datetime.strptime(utc_bounds(end)[1], TIMESTAMP_FORMAT) - timedelta(seconds=1)
+        last = last_second.strftime('%Y-%m')
+    return first, last
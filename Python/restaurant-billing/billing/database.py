@@ -0,0 +1,139 @@
+"""
+Shared SQLite connection layer for the Restaurant Billing System.
+
+Streamlit re-executes app.py on every interaction, but imported modules stay
+loaded for the lifetime of the server process. Keeping the pool here means
+every rerun (and every cashier session) reuses a small set of long-lived,
+pre-tuned connections instead of opening restaurant.db from scratch.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .profiling import ProfiledConnection
+
+DB_PATH = 'restaurant.db'
+POOL_SIZE = 8
+BUSY_TIMEOUT = 5.0  # seconds to wait on a locked database
+
+# Applied once per physical connection
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",       # ~16 MB page cache
+    "PRAGMA mmap_size=268435456",     # 256 MB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class ConnectionPool:
+    """Thread-safe pool of SQLite connections to a single database file"""
+
+    def __init__(self, db_path=DB_PATH, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_path, timeout=BUSY_TIMEOUT, check_same_thread=False, factory=ProfiledConnection
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self, timeout=None):
+        """Take an idle connection, opening a new one while under the pool size"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        return self._idle.get(timeout=timeout)
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any unfinished transaction"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commit on success, roll back on error"""
+        conn = self.acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every idle connection and reset the pool"""
+        with self._lock:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._created -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_default_path = DB_PATH
+
+
+def set_default_path(db_path):
+    """Point every default get_connection() at another database file
+
+    Used by scripts such as the benchmark to work on a scratch database.
+    """
+    global _default_path
+    _default_path = db_path
+
+
+def get_default_path():
+    return _default_path
+
+
+def get_pool(db_path=None):
+    """Return the process-wide pool for db_path, creating it on first use"""
+    if db_path is None:
+        db_path = _default_path
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = ConnectionPool(db_path)
+        return pool
+
+
+def get_connection(db_path=None):
+    """Context manager yielding a pooled connection to db_path"""
+    return get_pool(db_path).connection()
+
+
+def close_all():
+    """Close all pooled connections (used by scripts and tests on exit)"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
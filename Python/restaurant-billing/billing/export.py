@@ -0,0 +1,147 @@
+"""
+Sales history export for the Restaurant Billing System.
+
+Streams `orders` joined to `order_items` out of SQLite in fixed-size chunks
+and writes them as CSV, gzip-compressed CSV or Parquet. Only one chunk is
+held in memory at a time, so exporting years of history does not require
+loading it into a single DataFrame. With sharding enabled the outlet's
+month shards are exported one after another, oldest first.
+"""
+
+import gzip
+import io
+import sys
+import tempfile
+
+import pandas as pd
+
+from .database import get_connection
+from .shards import order_databases
+
+CHUNK_SIZE = 10000
+
+HISTORY_QUERY = '''
+    SELECT o.id AS order_id,
+           o.timestamp,
+           o.order_type,
+           o.payment_method,
+           o.total_amount,
+           o.gst_amount,
+           o.discount_amount,
+           i.menu_item_id,
+           i.item_name,
+           i.quantity,
+           i.price,
+           i.total_price
+    FROM orders o
+    JOIN order_items i ON i.order_id = o.id
+    ORDER BY o.id, i.id
+'''
+
+# Parquet column types for HISTORY_QUERY, fixed up front so a chunk whose
+# menu_item_id values are all NULL (off-menu items) still matches the rest
+HISTORY_COLUMNS = (
+    ('order_id', 'int64'),
+    ('timestamp', 'string'),
+    ('order_type', 'string'),
+    ('payment_method', 'string'),
+    ('total_amount', 'float64'),
+    ('gst_amount', 'float64'),
+    ('discount_amount', 'float64'),
+    ('menu_item_id', 'int64'),
+    ('item_name', 'string'),
+    ('quantity', 'int64'),
+    ('price', 'float64'),
+    ('total_price', 'float64'),
+)
+
+# format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'csv.gz': ('csv.gz', 'application/gzip'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+
+class ExportUnavailable(RuntimeError):
+    """Raised when a format's optional dependency is not installed"""
+
+
+def iter_history_chunks(conn, chunk_size=CHUNK_SIZE):
+    """Yield the order/line-item history as DataFrames of chunk_size rows"""
+    yield from pd.read_sql_query(HISTORY_QUERY, conn, chunksize=chunk_size)
+
+
+def _history_chunks(chunk_size):
+    for path in order_databases():
+        with get_connection(path) as conn:
+            yield from iter_history_chunks(conn, chunk_size)
+
+
+def _write_csv(chunks, binary_out):
+    text_out = io.TextIOWrapper(binary_out, encoding='utf-8', newline='')
+    rows = 0
+    for index, chunk in enumerate(chunks):
+        chunk.to_csv(text_out, index=False, header=(index == 0))
+        rows += len(chunk)
+    text_out.flush()
+    text_out.detach()  # leave binary_out open for the caller
+    return rows
+
+
+def _write_parquet(chunks, binary_out):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportUnavailable("Parquet export requires pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([pa.field(name, pa.type_for_alias(type_name)) for name, type_name in HISTORY_COLUMNS])
+    rows = 0
+    with pq.ParquetWriter(binary_out, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    return rows
+
+
+def export_history(binary_out, fmt='csv', chunk_size=CHUNK_SIZE):
+    """Write the full sales history to a binary file object; returns row count"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    chunks = _history_chunks(chunk_size)
+    if fmt == 'parquet':
+        return _write_parquet(chunks, binary_out)
+    if fmt == 'csv.gz':
+        with gzip.GzipFile(fileobj=binary_out, mode='wb') as gz_out:
+            return _write_csv(chunks, gz_out)
+    return _write_csv(chunks, binary_out)
+
+
+def export_history_to_tempfile(fmt='csv', chunk_size=CHUNK_SIZE):
+    """Export into an on-disk temporary file, rewound and ready to read"""
+    tmp = tempfile.TemporaryFile()
+    export_history(tmp, fmt, chunk_size)
+    tmp.seek(0)
+    return tmp
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python -m billing.export <output.csv|output.csv.gz|output.parquet>")
+        return
+
+    path = sys.argv[1]
+    fmt = next((f for f, (ext, _) in EXPORT_FORMATS.items() if path.endswith('.' + ext)), None)
+    if fmt is None:
+        print(f"❌ Unsupported file type: {path}")
+        return
+
+    with open(path, 'wb') as out:
+        rows = export_history(out, fmt)
+    print(f"✅ Exported {rows} order lines to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Federated chain-wide reports over outlet/month shards (see shards.py).
+
+Each shard keeps its own rollup tables, so a chain-wide report is a
+map-reduce: a process pool reads small partial aggregates from every shard
+in the requested range (shards for other months are skipped by file name)
+and the partials are summed here. Items are merged by name because menu
+ids are local to an outlet.
+
+    python -m billing.federation --root shards --start 2026-01-01 --end 2026-03-31
+"""
+
+import argparse
+import os
+import sqlite3
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .clock import utc_months
+from .shards import MENU_DB, list_outlets, list_shards
+
+FIRST_DATE = '0000-01-01'
+LAST_DATE = '9999-12-31'
+
+FederatedReport = namedtuple('FederatedReport', 'daily_sales popular_items outlet_sales')
+
+
+def _open_existing(path):
+    # mode=rw: never create a missing file, but still able to read WAL databases
+    return sqlite3.connect(f'file:{path}?mode=rw', uri=True)
+
+
+def shard_partials(task):
+    """Partial aggregates for one shard; runs in a pool worker
+
+    `task` is (outlet, shard_path, menu_path, start, end). Returns
+    (outlet, daily rows, item rows, (orders, revenue, gst, discount)).
+    """
+    outlet, shard_path, menu_path, start, end = task
+    conn = _open_existing(shard_path)
+    try:
+        daily = conn.execute('''
+            SELECT date, orders, revenue
+            FROM daily_sales
+            WHERE date BETWEEN ? AND ?
+        ''', (start, end)).fetchall()
+
+        items = []
+        if os.path.exists(menu_path):
+            conn.execute("ATTACH DATABASE ? AS outlet", (f'file:{menu_path}?mode=rw',))
+            items = conn.execute('''
+                SELECT m.name, SUM(s.total_quantity), SUM(s.total_revenue)
+                FROM item_daily_sales s
+                JOIN outlet.menu m ON m.id = s.menu_item_id
+                WHERE s.date BETWEEN ? AND ?
+                GROUP BY m.name
+            ''', (start, end)).fetchall()
+
+        totals = conn.execute('''
+            SELECT COALESCE(SUM(orders), 0), COALESCE(SUM(revenue), 0),
+                   COALESCE(SUM(gst), 0), COALESCE(SUM(discount), 0)
+            FROM sales_cube
+            WHERE date BETWEEN ? AND ?
+        ''', (start, end)).fetchone()
+    finally:
+        conn.close()
+    return outlet, daily, items, totals
+
+
+def merge_partials(partials, days=7, top=10):
+    """Sum shard partials into a FederatedReport"""
+    daily = pd.DataFrame(
+        [row for _, rows, _, _ in partials for row in rows],
+        columns=['date', 'orders', 'revenue']
+    )
+    daily_sales = daily.groupby('date', as_index=False).sum().sort_values('date', ascending=False)
+    if days:
+        daily_sales = daily_sales.head(days)
+
+    items = pd.DataFrame(
+        [row for _, _, rows, _ in partials for row in rows],
+        columns=['item_name', 'total_quantity', 'total_revenue']
+    )
+    popular_items = (
+        items.groupby('item_name', as_index=False).sum()
+        .sort_values('total_quantity', ascending=False)
+        .head(top)
+    )
+
+    outlet_sales = pd.DataFrame(
+        [(outlet,) + tuple(totals) for outlet, _, _, totals in partials],
+        columns=['outlet', 'orders', 'revenue', 'gst', 'discount']
+    ).groupby('outlet', as_index=False).sum()
+
+    return FederatedReport(
+        daily_sales.reset_index(drop=True),
+        popular_items.reset_index(drop=True),
+        outlet_sales,
+    )
+
+
+def federated_sales_report(root, start=None, end=None, outlets=None, workers=None, days=7, top=10):
+    """Chain-wide daily sales, top items and per-outlet totals
+
+    Dates are inclusive 'YYYY-MM-DD' strings (or dates); `outlets` defaults
+    to every outlet under root. `days` limits daily_sales to the most recent
+    days (None for all of them), like get_sales_report().
+    """
+    # Shards are split by UTC month and rollup dates are local
+    first_month, last_month = utc_months(start, end)
+    start = str(start) if start else FIRST_DATE
+    end = str(end) if end else LAST_DATE
+
+    tasks = []
+    for outlet in outlets or list_outlets(root):
+        menu_path = os.path.join(root, outlet, MENU_DB)
+        for _, shard_path in list_shards(root, outlet, first_month, last_month):
+            tasks.append((outlet, shard_path, menu_path, start, end))
+
+    if len(tasks) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(shard_partials, tasks))
+    else:
+        partials = [shard_partials(task) for task in tasks]
+
+    return merge_partials(partials, days, top)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chain-wide sales report across outlet shards")
+    parser.add_argument('--root', required=True, help="directory holding one folder per outlet")
+    parser.add_argument('--start', help="first date (YYYY-MM-DD)")
+    parser.add_argument('--end', help="last date (YYYY-MM-DD)")
+    parser.add_argument('--outlet', action='append', dest='outlets', help="limit to an outlet (repeatable)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    report = federated_sales_report(args.root, args.start, args.end, args.outlets, args.workers)
+    print("🏪 Sales by outlet")
+    print(report.outlet_sales.to_string(index=False))
+    print("\n📅 Daily sales")
+    print(report.daily_sales.to_string(index=False))
+    print("\n🔥 Popular items")
+    print(report.popular_items.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
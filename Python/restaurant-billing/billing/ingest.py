@@ -0,0 +1,306 @@
+"""
+Asynchronous order ingest for the Restaurant Billing System.
+
+With async ingest enabled, commit_order() no longer waits for SQLite:
+
+  1. the order gets its id straight away from a block of ids reserved in
+     the database,
+  2. it is appended to a local journal file (JSON lines) and put on a
+     bounded queue, and the id is returned to the caller,
+  3. a background writer fsyncs the journal once per batch and drains the
+     batch into SQLite with write_orders(), retrying with backoff while the
+     database is busy or locked (report queries, backups).
+
+On start-up any journalled orders missing from the database are replayed,
+and the journal is truncated whenever everything in it has been written.
+
+Ids are reserved ID_BLOCK_SIZE at a time by raising the orders row of
+sqlite_sequence inside a write transaction. Every AUTOINCREMENT insert
+(api.py, scripts, another process) allocates above that value, so it can
+run alongside async ingest without taking one of the reserved ids. The
+writer reserves the next block once half of the current one is handed out,
+so submit() never waits on the database; if it runs out of ids anyway it
+raises IngestQueueFull.
+
+A write that fails for any other reason, or is still busy after
+RETRY_ATTEMPTS tries, stops the writer: the orders stay in the journal and submit() raises IngestFailed
+from then on, rather than accepting orders that will never be saved.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from . import order_store
+from .database import get_connection, get_default_path
+
+INGEST_QUEUE_SIZE = 1000
+INGEST_BATCH_SIZE = 100
+INGEST_FLUSH_INTERVAL = 0.05  # seconds the writer waits to fill a batch
+ID_BLOCK_SIZE = 100  # order ids reserved per database round trip
+RETRY_DELAY = 0.2  # seconds before the first retry while the database is busy
+RETRY_MAX_DELAY = 5.0  # the delay doubles up to this
+RETRY_ATTEMPTS = 8
+
+_logger = logging.getLogger('billing.ingest')
+
+
+class IngestQueueFull(Exception):
+    """Raised when the writer has fallen too far behind to accept orders"""
+
+
+class IngestFailed(Exception):
+    """Raised when journalled orders cannot be written to the database"""
+
+
+class OrderIngest:
+    """Journal-backed queue that drains orders into SQLite in the background"""
+
+    def __init__(self, db_path=None, journal_path=None, max_queue=INGEST_QUEUE_SIZE,
+                 batch_size=INGEST_BATCH_SIZE, flush_interval=INGEST_FLUSH_INTERVAL):
+        self.db_path = db_path or get_default_path()
+        self.journal_path = journal_path or self.db_path + '.journal'
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._journal = None
+        self._next_id = None
+        self._last_id = None  # end of the reserved block
+        self._spare = None  # next (first, last) block, reserved by the writer
+        self._error = None
+        self._submitted = 0
+        self._written = 0
+        self._thread = None
+
+    # -- lifecycle -------------------------------------------------------
+
+    def start(self):
+        replayed = self._replay_journal()
+        try:
+            self._next_id, self._last_id = self._reserve_ids()
+        except sqlite3.Error as e:
+            raise IngestFailed(f"Could not reserve order ids: {e}") from e
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name="order-ingest", daemon=True)
+        self._thread.start()
+        return replayed
+
+    def stop(self, timeout=None):
+        """Drain everything queued, then stop the writer"""
+        if self._thread is None:
+            return
+        if self._thread.is_alive():
+            self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        self._journal.close()
+
+    # -- producer side ---------------------------------------------------
+
+    def submit(self, order):
+        """Journal and enqueue an order; returns its id without waiting for SQLite"""
+        with self._lock:
+            if self._error is not None:
+                raise IngestFailed(f"Order writer stopped: {self._error}") from self._error
+            if self._queue.full():
+                raise IngestQueueFull("Order queue is full; the database may be unavailable")
+            if self._next_id > self._last_id:
+                if self._spare is None:
+                    raise IngestQueueFull("No order ids reserved; the database may be busy")
+                (self._next_id, self._last_id), self._spare = self._spare, None
+            # Stamped here at the latest, so a replay keeps the original time
+            order = dict(order, id=self._next_id, timestamp=order.get('timestamp') or order_store.utc_timestamp())
+            self._next_id += 1
+            self._journal.write(json.dumps(order) + '\n')
+            self._submitted += 1
+            self._queue.put_nowait(order)
+        return order['id']
+
+    def pending(self):
+        """Orders accepted but not yet written to SQLite"""
+        return self._submitted - self._written
+
+    def _reserve_ids(self):
+        """Claim the next ID_BLOCK_SIZE order ids in the database; returns (first, last)"""
+        with get_connection(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            last = conn.execute('''
+                SELECT MAX(
+                    COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'orders'), 0),
+                    COALESCE((SELECT MAX(id) FROM orders), 0)
+                )
+            ''').fetchone()[0]
+            reserved = last + ID_BLOCK_SIZE
+            if not conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'orders'", (reserved,)).rowcount:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('orders', ?)", (reserved,))
+            conn.commit()
+        return last + 1, reserved
+
+    # -- writer side -----------------------------------------------------
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        stop = False
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                stop = True
+                break
+            batch.append(entry)
+        return batch, stop
+
+    def _retry(self, action, what):
+        delay = RETRY_DELAY
+        for attempt in range(1, RETRY_ATTEMPTS + 1):
+            try:
+                return action()
+            except sqlite3.OperationalError as e:
+                # Busy/locked database: the journal still has the orders
+                if not _is_busy(e) or attempt == RETRY_ATTEMPTS:
+                    raise
+                _logger.warning("Database busy, retrying %s in %.1fs (attempt %d/%d): %s",
+                                what, delay, attempt, RETRY_ATTEMPTS, e)
+                time.sleep(delay)
+                delay = min(delay * 2, RETRY_MAX_DELAY)
+
+    def _write_batch(self, batch):
+        def write():
+            with get_connection(self.db_path) as conn:
+                order_store.write_orders(conn, batch)
+        self._retry(write, f"{len(batch)} orders")
+
+    def _top_up_ids(self):
+        """Reserve the next id block once half of the current one is handed out"""
+        with self._lock:
+            if self._spare is not None or self._last_id - self._next_id + 1 > ID_BLOCK_SIZE // 2:
+                return
+        spare = self._retry(self._reserve_ids, "the id reservation")
+        with self._lock:
+            self._spare = spare
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            batch, stop = self._collect(entry)
+
+            with self._lock:
+                self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+            try:
+                self._top_up_ids()
+                self._write_batch(batch)
+            except Exception as e:
+                # The journal keeps this batch and everything queued after it
+                _logger.error("Order ingest stopped; orders %s stay in %s",
+                              [o['id'] for o in batch], self.journal_path, exc_info=True)
+                with self._lock:
+                    self._error = e
+                return
+            with self._lock:
+                self._written += len(batch)
+                if self._written == self._submitted:
+                    self._journal.truncate(0)
+                    self._journal.seek(0)
+            if stop:
+                return
+
+    def _replay_journal(self):
+        """Write journalled orders that never reached the database"""
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        orders = []
+        with open(self.journal_path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    orders.append(json.loads(line))
+                except ValueError:
+                    break  # torn final write from a crash
+
+        missing = []
+        with get_connection(self.db_path) as conn:
+            for start in range(0, len(orders), 500):
+                chunk = orders[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                existing = {
+                    row[0]: row[1:] for row in conn.execute(
+                        f"SELECT id, order_type, total_amount, payment_method, timestamp"
+                        f" FROM orders WHERE id IN ({placeholders})",
+                        [order['id'] for order in chunk]
+                    )
+                }
+                for order in chunk:
+                    row = existing.get(order['id'])
+                    if row is None:
+                        missing.append(order)
+                    elif row != (order['order_type'], order['total_amount'],
+                                 order['payment_method'], order['timestamp']):
+                        # Another writer took the id; keep the journal for inspection
+                        raise IngestFailed(
+                            f"Journalled order #{order['id']} conflicts with a different order in "
+                            f"the database; fix or move {self.journal_path} before restarting"
+                        )
+            if missing:
+                order_store.write_orders(conn, missing)
+
+        os.remove(self.journal_path)
+        return len(missing)
+
+
+def _is_busy(error):
+    """True for SQLITE_BUSY / SQLITE_LOCKED, the errors worth retrying"""
+    code = getattr(error, 'sqlite_errorcode', None)  # Python 3.11+
+    if code is not None:
+        return code & 0xff in (5, 6)
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+
+_ingest = None
+_ingest_lock = threading.Lock()
+
+
+def enable_async_ingest(**options):
+    """Start the shared ingest writer and route commit_order() through it"""
+    global _ingest
+    with _ingest_lock:
+        if _ingest is None:
+            if order_store.get_router() is not None:
+                raise RuntimeError("Async ingest allocates order ids from one database; disable sharding first")
+            ingest = OrderIngest(**options)
+            replayed = ingest.start()
+            _ingest = ingest
+            if replayed:
+                _logger.warning("Replayed %d journalled orders", replayed)
+            order_store.set_ingest(_ingest)
+            atexit.register(disable_async_ingest)
+        return _ingest
+
+
+def disable_async_ingest():
+    """Drain outstanding orders and return to synchronous commits"""
+    global _ingest
+    with _ingest_lock:
+        if _ingest is not None:
+            order_store.set_ingest(None)
+            _ingest.stop()
+            _ingest = None
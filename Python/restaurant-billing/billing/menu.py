@@ -0,0 +1,137 @@
+"""
+Menu repository for the Restaurant Billing System.
+
+Reads go through a process-level cache: Streamlit reruns app.py on every
+widget interaction, so the menu DataFrame is loaded once and kept until the
+menu changes. Triggers on the `menu` table bump the menu_revision row (see
+schema.py), so a write from any connection or process - menu imports, a
+second app server, a sqlite3 shell - reloads the cache on its next read.
+That costs one primary-key lookup per read. invalidate_menu() still forces
+a reload, e.g. after pointing the default path at another database.
+"""
+
+import threading
+
+import pandas as pd
+
+from .database import get_connection, get_default_path
+
+
+class VersionedCache:
+    """Holds one value produced by `loader`
+
+    The value is reloaded after invalidate() or when `version()` (e.g. a
+    revision stored in the database) returns something new.
+    """
+
+    def __init__(self, loader, version=None):
+        self._loader = loader
+        self._version = version or (lambda: None)
+        self._lock = threading.Lock()
+        self._revision = 0
+        self._entry = None  # (revision, value)
+
+    @property
+    def revision(self):
+        return self._revision, self._version()
+
+    def get(self):
+        revision = self.revision
+        entry = self._entry
+        if entry is not None and entry[0] == revision:
+            return entry[1]
+
+        with self._lock:
+            if self._entry is not None and self._entry[0] == revision:
+                return self._entry[1]
+            value = self._loader()
+            # Tag with the revision seen *before* loading so a concurrent
+            # invalidate() forces the next caller to reload.
+            self._entry = (revision, value)
+            return value
+
+    def invalidate(self):
+        with self._lock:
+            self._revision += 1
+            self._entry = None
+
+
+def _load_menu_items():
+    with get_connection() as conn:
+        return pd.read_sql_query(
+            "SELECT id, name, category, price, gst FROM menu WHERE active = 1 ORDER BY category, name",
+            conn
+        )
+
+
+def _index_by_category():
+    # One groupby pass instead of a boolean filter per category
+    menu_df = _menu.get()
+    return {
+        category: items.reset_index(drop=True)
+        for category, items in menu_df.groupby('category', sort=True)
+    }
+
+
+def _stored_revision():
+    with get_connection() as conn:
+        revision = conn.execute("SELECT revision FROM menu_revision WHERE id = 1").fetchone()[0]
+    return get_default_path(), revision
+
+
+_menu = VersionedCache(_load_menu_items, _stored_revision)
+_menu_by_category = VersionedCache(_index_by_category, lambda: _menu.revision)
+
+
+def get_menu_items():
+    """Return the menu as a DataFrame (shared - treat as read-only)"""
+    return _menu.get()
+
+
+def get_menu_by_category():
+    """Return {category: DataFrame of its items}, built once per menu revision"""
+    return _menu_by_category.get()
+
+
+def invalidate_menu():
+    """Force the next read to reload (menu writes are also caught by menu_revision)"""
+    _menu.invalidate()
+    _menu_by_category.invalidate()
+
+
+def menu_revision():
+    return _menu.revision
+
+
+def add_menu_item(name, category, price, gst):
+    with get_connection() as conn:
+        cursor = conn.execute(
+            "INSERT INTO menu (name, category, price, gst) VALUES (?, ?, ?, ?)",
+            (name, category, price, gst)
+        )
+        item_id = cursor.lastrowid
+    invalidate_menu()
+    return item_id
+
+
+def delete_menu_item(item_id):
+    """Retire a menu item; past order lines keep referencing its id"""
+    with get_connection() as conn:
+        conn.execute("UPDATE menu SET active = 0 WHERE id = ?", (item_id,))
+    invalidate_menu()
+
+
+def resolve_menu_ids(conn, names):
+    """Map item names to menu ids, preferring active and then newest items"""
+    names = list(set(names))
+    ids = {}
+    for start in range(0, len(names), 500):
+        chunk = names[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        # Later rows win, so order by preference ascending
+        for name, item_id in conn.execute(
+            f"SELECT name, id FROM menu WHERE name IN ({placeholders}) ORDER BY active, id",
+            chunk
+        ):
+            ids[name] = item_id
+    return ids
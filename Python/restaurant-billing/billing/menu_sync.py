@@ -0,0 +1,176 @@
+"""
+Bulk menu import/export for the Restaurant Billing System.
+
+A menu file (CSV with a name,category,price,gst header like menu.csv, or a
+JSON list of objects with the same keys) is diffed against the `menu` table
+by item name, and the resulting inserts, updates and removals are applied
+in one BEGIN IMMEDIATE transaction with executemany. Removed items are
+retired (active = 0) like delete_menu_item(); an item that comes back is
+reactivated under its old id so its sales history continues.
+
+    python -m billing.menu_sync import menu.csv [--dry-run] [--keep-missing]
+    python -m billing.menu_sync export menu.csv
+"""
+
+import argparse
+import csv
+import io
+import json
+from collections import namedtuple
+
+from .bill import DEFAULT_GST
+from .database import get_connection
+from .menu import invalidate_menu
+
+MENU_FIELDS = ('name', 'category', 'price', 'gst')
+MENU_FILE_FORMATS = ('csv', 'json')
+
+# Row tuples, ready for executemany: inserts are (name, category, price, gst);
+# updates and reactivations (category, price, gst, id); retirements (id,)
+MenuDiff = namedtuple('MenuDiff', ['inserts', 'updates', 'reactivations', 'retirements'])
+
+
+def menu_file_format(filename):
+    fmt = filename.rsplit('.', 1)[-1].lower()
+    if fmt not in MENU_FILE_FORMATS:
+        raise ValueError(f"Unsupported menu file: {filename} (use .csv or .json)")
+    return fmt
+
+
+def _parse_row(row, line):
+    try:
+        name = row['name'].strip()
+        category = row['category'].strip()
+        price = float(row['price'])
+        gst = row.get('gst')
+        gst = DEFAULT_GST if gst in (None, '') else float(gst)
+    except (KeyError, AttributeError, TypeError, ValueError) as e:
+        raise ValueError(f"Menu row {line}: {e!r}") from None
+    if not name or not category or price < 0 or gst < 0:
+        raise ValueError(f"Menu row {line}: name, category, price and gst are required")
+    return name, category, round(price, 2), round(gst, 2)
+
+
+def read_menu_file(binary_in, fmt='csv'):
+    """Parse a menu file object into {name: (name, category, price, gst)}"""
+    text_in = io.TextIOWrapper(binary_in, encoding='utf-8-sig', newline='')
+    try:
+        rows = csv.DictReader(text_in) if fmt == 'csv' else json.load(text_in)
+        items = {}
+        for line, row in enumerate(rows, start=2 if fmt == 'csv' else 1):
+            item = _parse_row(row, line)
+            if item[0] in items:
+                raise ValueError(f"Menu row {line}: duplicate item {item[0]!r}")
+            items[item[0]] = item
+    finally:
+        text_in.detach()  # leave binary_in open for the caller
+    return items
+
+
+def diff_menu(conn, items, keep_missing=False):
+    """Compare parsed menu items with the menu table"""
+    current = {}
+    retired = {}
+    for item_id, name, category, price, gst, active in conn.execute(
+            "SELECT id, name, category, price, gst, active FROM menu ORDER BY id"):
+        # Newest row wins if a name was ever entered twice
+        (current if active else retired)[name] = (item_id, category, price, gst)
+
+    inserts, updates, reactivations = [], [], []
+    for name, category, price, gst in items.values():
+        if name in current:
+            item_id, *fields = current[name]
+            if fields != [category, price, gst]:
+                updates.append((category, price, gst, item_id))
+        elif name in retired:
+            reactivations.append((category, price, gst, retired[name][0]))
+        else:
+            inserts.append((name, category, price, gst))
+
+    retirements = [] if keep_missing else [
+        (item_id,) for name, (item_id, *_) in current.items() if name not in items
+    ]
+    return MenuDiff(inserts, updates, reactivations, retirements)
+
+
+def apply_menu_diff(conn, diff):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            "INSERT INTO menu (name, category, price, gst) VALUES (?, ?, ?, ?)", diff.inserts
+        )
+        conn.executemany(
+            "UPDATE menu SET category = ?, price = ?, gst = ? WHERE id = ?", diff.updates
+        )
+        conn.executemany(
+            "UPDATE menu SET category = ?, price = ?, gst = ?, active = 1 WHERE id = ?", diff.reactivations
+        )
+        conn.executemany("UPDATE menu SET active = 0 WHERE id = ?", diff.retirements)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def import_menu(binary_in, fmt='csv', keep_missing=False, dry_run=False):
+    """Make the menu match a menu file in one transaction; returns the MenuDiff
+
+    Items missing from the file are retired unless keep_missing is set.
+    """
+    items = read_menu_file(binary_in, fmt)
+    with get_connection() as conn:
+        diff = diff_menu(conn, items, keep_missing)
+        if not dry_run and any(diff):
+            apply_menu_diff(conn, diff)
+    if not dry_run and any(diff):
+        invalidate_menu()
+    return diff
+
+
+def export_menu(binary_out, fmt='csv'):
+    """Write the active menu as CSV (menu.csv layout) or JSON; returns item count"""
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT id, name, category, price, gst FROM menu WHERE active = 1 ORDER BY id"
+        ).fetchall()
+
+    text_out = io.TextIOWrapper(binary_out, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        writer = csv.writer(text_out)
+        writer.writerow(('id',) + MENU_FIELDS)
+        writer.writerows(rows)
+    else:
+        json.dump([dict(zip(('id',) + MENU_FIELDS, row)) for row in rows], text_out, indent=2)
+    text_out.flush()
+    text_out.detach()
+    return len(rows)
+
+
+def describe_diff(diff):
+    return (f"{len(diff.inserts)} new, {len(diff.updates)} changed, "
+            f"{len(diff.reactivations)} restored, {len(diff.retirements)} removed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import or export the menu")
+    parser.add_argument('action', choices=('import', 'export'))
+    parser.add_argument('path', help="menu .csv or .json file")
+    parser.add_argument('--dry-run', action='store_true', help="show the changes without applying them")
+    parser.add_argument('--keep-missing', action='store_true', help="do not remove items missing from the file")
+    args = parser.parse_args()
+
+    fmt = menu_file_format(args.path)
+    if args.action == 'export':
+        with open(args.path, 'wb') as out:
+            count = export_menu(out, fmt)
+        print(f"✅ Exported {count} menu items to {args.path}")
+        return
+
+    with open(args.path, 'rb') as menu_file:
+        diff = import_menu(menu_file, fmt, args.keep_missing, args.dry_run)
+    verb = "Would apply" if args.dry_run else "Applied"
+    print(f"✅ {verb}: {describe_diff(diff)}")
+
+
+if __name__ == "__main__":
+    main()
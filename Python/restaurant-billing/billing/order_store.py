@@ -0,0 +1,279 @@
+"""
+Order persistence for the Restaurant Billing System.
+
+Each order is written as one explicit `BEGIN IMMEDIATE` transaction: the
+`orders` header row followed by every line item in a single `executemany`.
+Taking the write lock up front avoids the "database is locked" failures that
+happen when a deferred transaction tries to upgrade to a writer. The
+daily_sales/item_sales rollups (see schema.py) are updated in the same
+transaction.
+
+Optionally, a group-commit writer can be enabled. Orders submitted from
+several terminals within a few milliseconds of each other are then written
+in one shared transaction, so they cost one fsync instead of one each.
+
+With sharding enabled (see shards.py) store_orders() hands orders to the
+shard router, which writes each one to its outlet's month database.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .bill import compute_bill, from_paise
+from .clock import utc_timestamp
+from .database import get_connection
+from .menu import resolve_menu_ids
+from .schema import update_rollups
+
+GROUP_COMMIT_WINDOW = 0.0  # extra seconds to wait for more orders under contention
+GROUP_COMMIT_MAX_BATCH = 64
+
+# id is normally NULL (auto-assigned); async ingest supplies it up front
+INSERT_ORDER = '''
+    INSERT INTO orders (id, order_type, total_amount, gst_amount, discount_amount, payment_method, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_ORDER_ITEM = '''
+    INSERT INTO order_items (order_id, menu_item_id, item_name, quantity, price, total_price)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+
+def make_order(order_type, items, total_amount, gst_amount, payment_method, discount=0, timestamp=None):
+    """Build the order dict accepted by commit_order()
+
+    `items` is a list of {'menu_item_id', 'name', 'price', 'quantity'} dicts,
+    as returned by Cart.items(); items without a menu_item_id are matched to
+    the menu by name when written. `timestamp` ('YYYY-MM-DD HH:MM:SS', UTC)
+    defaults to now, so the order keeps the time it was billed even if it
+    is written later (async ingest, journal replay).
+    """
+    return {
+        'order_type': order_type,
+        'total_amount': total_amount,
+        'gst_amount': gst_amount,
+        'discount_amount': discount,
+        'payment_method': payment_method,
+        'items': [dict(item) for item in items],
+        'timestamp': timestamp or utc_timestamp(),
+    }
+
+
+def write_orders(conn, orders):
+    """Write orders in one BEGIN IMMEDIATE transaction and return their ids"""
+    order_ids = []
+    order_rows = []
+    item_rows = []
+
+    unresolved = [
+        item['name'] for order in orders for item in order['items'] if item.get('menu_item_id') is None
+    ]
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        menu_ids = resolve_menu_ids(conn, unresolved) if unresolved else {}
+        for order in orders:
+            timestamp = order.get('timestamp') or utc_timestamp()
+            cursor = conn.execute(INSERT_ORDER, (
+                order.get('id'),
+                order['order_type'],
+                order['total_amount'],
+                order['gst_amount'],
+                order['discount_amount'],
+                order['payment_method'],
+                timestamp,
+            ))
+            order_id = cursor.lastrowid
+            order_ids.append(order_id)
+            order_rows.append((
+                order_id, timestamp, order['order_type'], order['payment_method'],
+                order['total_amount'], order['gst_amount'], order['discount_amount'],
+            ))
+            item_rows.extend(
+                (order_id, item.get('menu_item_id') or menu_ids.get(item['name']), item['name'],
+                 item['quantity'], item['price'], item['price'] * item['quantity'])
+                for item in order['items']
+            )
+        conn.executemany(INSERT_ORDER_ITEM, item_rows)
+        update_rollups(conn.cursor(), order_rows, item_rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return order_ids
+
+
+def store_orders(orders, db_path=None):
+    """Write orders to db_path, or to their month shards when sharding is on"""
+    router = _router
+    if router is not None:
+        return router.write(orders)
+    with get_connection(db_path) as conn:
+        return write_orders(conn, orders)
+
+
+class GroupCommitter:
+    """Background writer that coalesces concurrently submitted orders"""
+
+    def __init__(self, db_path=None, window=GROUP_COMMIT_WINDOW, max_batch=GROUP_COMMIT_MAX_BATCH):
+        self.db_path = db_path
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="order-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, order):
+        """Queue an order; the returned Future resolves to its order id"""
+        future = Future()
+        self._queue.put((order, future))
+        return future
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        # Everything that queued up while the previous batch was committing
+        while len(batch) < self.max_batch:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)  # let _run see the stop marker
+                return batch
+            batch.append(entry)
+
+        # A lone order is written straight away; under contention wait a
+        # little longer so more terminals can share the commit.
+        if len(batch) == 1:
+            return batch
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            batch = self._collect(entry)
+            try:
+                order_ids = store_orders([order for order, _ in batch], self.db_path)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), order_id in zip(batch, order_ids):
+                    future.set_result(order_id)
+
+
+_group_committer = None
+_group_lock = threading.Lock()
+_ingest = None
+_router = None
+
+
+def enable_group_commit(window=GROUP_COMMIT_WINDOW, max_batch=GROUP_COMMIT_MAX_BATCH):
+    """Route commit_order() through a shared group-commit writer"""
+    global _group_committer
+    with _group_lock:
+        if _group_committer is None:
+            _group_committer = GroupCommitter(window=window, max_batch=max_batch)
+        return _group_committer
+
+
+def disable_group_commit():
+    global _group_committer
+    with _group_lock:
+        if _group_committer is not None:
+            _group_committer.stop()
+            _group_committer = None
+
+
+def set_ingest(ingest):
+    """Install (or remove, with None) an async writer for commit_order()"""
+    global _ingest
+    _ingest = ingest
+
+
+def get_ingest():
+    return _ingest
+
+
+def set_router(router):
+    """Install (or remove, with None) a shard router for order writes"""
+    global _router
+    _router = router
+
+
+def get_router():
+    return _router
+
+
+def commit_order(order):
+    """Persist a single order and return its id
+
+    With async ingest enabled (see ingest.py) this returns as soon as the
+    order is journalled; the SQLite write happens in the background.
+    """
+    ingest = _ingest
+    if ingest is not None:
+        return ingest.submit(order)
+
+    committer = _group_committer
+    if committer is not None:
+        return committer.submit(order).result()
+
+    return store_orders([order])[0]
+
+
+def commit_orders(orders):
+    """Persist many orders (e.g. an imported batch) in one transaction
+
+    (one transaction per month shard when sharding is on)
+    """
+    return store_orders(orders)
+
+
+def checkout(cart, order_type, payment_method, discount=0.0, timestamp=None):
+    """Price a Cart, persist it as an order and clear it
+
+    Returns (order_id, BillTotals), or (None, None) for an empty cart. Pass
+    `timestamp` (see utc_timestamp()) to print the receipt with the exact
+    time stored on the order.
+    """
+    if not cart:
+        return None, None
+
+    items = cart.items()
+    bill = compute_bill(items, discount)
+    order = make_order(
+        order_type,
+        items,
+        from_paise(bill.final_total),
+        from_paise(bill.gst),
+        payment_method,
+        from_paise(bill.discount),
+        timestamp,
+    )
+    order_id = commit_order(order)
+    cart.clear()
+    return order_id, bill
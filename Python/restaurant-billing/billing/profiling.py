@@ -0,0 +1,217 @@
+"""
+Rerun-cost profiler for the Restaurant Billing System.
+
+Streamlit re-executes app.py on every interaction. For a sampled fraction
+of those reruns this records:
+  - spans: wall time of named blocks (CSS injection, init_database(), each
+    page, menu loading, ...) marked with span() / @profiled
+  - SQL: time spent executing each statement on this thread's pooled
+    connections (database.py creates them with ProfiledConnection)
+  - the number of widgets the rerun created (passed in by the app)
+
+Finished profiles are appended as JSON lines to a size-capped rotating log
+and kept in memory for the app's debug panel. Reruns that are not sampled
+pay one thread-local lookup per span and per statement.
+"""
+
+import json
+import logging
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+
+PROFILE_SAMPLE_RATE = 0.01  # fraction of reruns profiled by default
+PROFILE_LOG = 'rerun_profile.log'
+PROFILE_LOG_BYTES = 1024 * 1024
+PROFILE_LOG_BACKUPS = 3
+RECENT_PROFILES = 200  # kept in memory for the debug panel
+
+_state = threading.local()
+_recent = deque(maxlen=RECENT_PROFILES)
+_settings = {'sample_rate': PROFILE_SAMPLE_RATE, 'log_path': PROFILE_LOG}
+_logger = logging.getLogger('billing.profiling')
+_logger.propagate = False
+_log_lock = threading.Lock()
+_WHITESPACE = re.compile(r'\s+')
+
+
+def configure(sample_rate=None, log_path=None):
+    """Change the sampling rate (0 disables) or the rolling log location"""
+    if sample_rate is not None:
+        _settings['sample_rate'] = sample_rate
+    if log_path is not None and log_path != _settings['log_path']:
+        with _log_lock:
+            for handler in list(_logger.handlers):
+                _logger.removeHandler(handler)
+                handler.close()
+            _settings['log_path'] = log_path
+
+
+class RerunProfile:
+    """Timings collected during one rerun"""
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.total_ms = None
+        self.spans = []  # (name, depth, start offset ms, ms) in the order they finished
+        self.sql = {}  # statement -> [count, ms]
+        self.widgets = None
+        self.depth = 0
+
+    def add_sql(self, statement, seconds):
+        entry = self.sql.get(statement)
+        if entry is None:
+            entry = self.sql[statement] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds * 1000
+
+    def finish(self, widgets=None):
+        self.total_ms = (time.perf_counter() - self._start) * 1000
+        self.widgets = widgets
+
+    def sql_ms(self):
+        return sum(ms for _, ms in self.sql.values())
+
+    def as_dict(self):
+        return {
+            'label': self.label,
+            'started': round(self.started, 3),
+            'total_ms': round(self.total_ms or 0.0, 3),
+            'widgets': self.widgets,
+            'spans': [
+                {'name': name, 'depth': depth, 'start_ms': round(offset, 3), 'ms': round(ms, 3)}
+                for name, depth, offset, ms in sorted(self.spans, key=lambda entry: entry[2])
+            ],
+            'sql_ms': round(self.sql_ms(), 3),
+            'sql': [
+                {'statement': statement, 'count': count, 'ms': round(ms, 3)}
+                for statement, (count, ms) in sorted(self.sql.items(), key=lambda entry: -entry[1][1])
+            ],
+        }
+
+
+def current_profile():
+    return getattr(_state, 'profile', None)
+
+
+def start_rerun(label='rerun', force=False):
+    """Begin profiling this thread's rerun if it is sampled; returns the profile or None"""
+    rate = _settings['sample_rate']
+    if force or (rate > 0 and random.random() < rate):
+        _state.profile = RerunProfile(label)
+    else:
+        _state.profile = None
+    return _state.profile
+
+
+def finish_rerun(widgets=None):
+    """Close the current profile, log it and return it (None if not sampled)"""
+    profile = current_profile()
+    if profile is None:
+        return None
+    _state.profile = None
+    profile.finish(widgets)
+    _recent.append(profile)
+    _write_log(profile)
+    return profile
+
+
+def _write_log(profile):
+    with _log_lock:
+        if not _logger.handlers and _settings['log_path']:
+            handler = RotatingFileHandler(
+                _settings['log_path'], maxBytes=PROFILE_LOG_BYTES, backupCount=PROFILE_LOG_BACKUPS,
+                encoding='utf-8', delay=True
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            _logger.addHandler(handler)
+            _logger.setLevel(logging.INFO)
+    _logger.info(json.dumps(profile.as_dict()))
+
+
+def recent_profiles():
+    """Profiles finished in this process, oldest first"""
+    return list(_recent)
+
+
+@contextmanager
+def span(name):
+    """Time a block as part of the current rerun (no-op when not sampled)"""
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+    depth = profile.depth
+    profile.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.depth = depth
+        profile.spans.append((
+            name, depth, (start - profile._start) * 1000, (time.perf_counter() - start) * 1000
+        ))
+
+
+def profiled(name=None):
+    """Decorator form of span(), named after the function by default"""
+    def decorate(func):
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if current_profile() is None:
+                return func(*args, **kwargs)
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _statement_key(sql):
+    return _WHITESPACE.sub(' ', sql).strip()[:160]
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that reports execute() time to the current profile"""
+
+    def execute(self, sql, parameters=()):
+        profile = current_profile()
+        if profile is None:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            profile.add_sql(_statement_key(sql), time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        profile = current_profile()
+        if profile is None:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            profile.add_sql(_statement_key(sql), time.perf_counter() - start)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors (including pandas') are profiled"""
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
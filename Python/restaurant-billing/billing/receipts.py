@@ -0,0 +1,249 @@
+"""
+Printable receipts for the Restaurant Billing System.
+
+Receipts are rendered as fixed-width text for thermal printers, and as a
+one-page PDF of the same text set in Courier (no PDF library needed). The
+layout for each paper width - rules, header lines and column format strings
+- is built once and cached, so rendering an order is a handful of
+str.format calls.
+
+render_day() re-renders every receipt for a day in a process pool:
+
+    python -m billing.receipts 2026-01-15 --out receipts --format pdf --format txt
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
+
+from .clock import utc_bounds, utc_months
+from .database import get_connection
+from .shards import order_database, order_databases
+
+RECEIPT_WIDTH = 40  # characters per line (80 mm roll, small font)
+RESTAURANT_NAME = 'Restaurant Billing System'
+RECEIPT_FOOTER = 'Thank you! Visit again'
+RECEIPT_FORMATS = ('txt', 'pdf')
+BATCH_CHUNK = 1000  # orders per worker task
+
+PDF_FONT_SIZE = 8
+PDF_MARGIN = 18  # points
+
+
+class ReceiptTemplate:
+    """Pre-built layout for one paper width"""
+
+    NAME_MIN = 10
+    QTY_WIDTH = 5
+    AMOUNT_WIDTH = 10
+
+    def __init__(self, width=RECEIPT_WIDTH):
+        name_width = max(self.NAME_MIN, width - self.QTY_WIDTH - self.AMOUNT_WIDTH)
+        self.width = name_width + self.QTY_WIDTH + self.AMOUNT_WIDTH
+        self.rule = '-' * self.width
+        self.header = '\n'.join([RESTAURANT_NAME.center(self.width).rstrip(), self.rule])
+        self.footer = '\n'.join([self.rule, RECEIPT_FOOTER.center(self.width).rstrip()])
+        self.item_line = (
+            f'{{name:<{name_width}.{name_width}}}'
+            f'{{quantity:>{self.QTY_WIDTH}}}{{amount:>{self.AMOUNT_WIDTH}.2f}}'
+        )
+        self.columns = (
+            f'{"Item":<{name_width}}{"Qty":>{self.QTY_WIDTH}}{"Amount":>{self.AMOUNT_WIDTH}}'
+        )
+        self.total_line = f'{{label:<{self.width - self.AMOUNT_WIDTH}}}{{amount:>{self.AMOUNT_WIDTH}.2f}}'
+
+    def pair(self, left, right):
+        return f'{left:<{self.width - len(right)}.{self.width - len(right)}}{right}'
+
+    def render(self, order):
+        """Receipt text for an order dict (make_order() shape plus 'id')"""
+        lines = [
+            self.header,
+            self.pair(f"Order #{order['id']}", order['order_type']),
+            self.pair(str(order.get('timestamp') or ''), order['payment_method']),
+            self.rule,
+            self.columns,
+        ]
+        subtotal = 0.0
+        for item in order['items']:
+            amount = item['price'] * item['quantity']
+            subtotal += amount
+            lines.append(self.item_line.format(name=item['name'], quantity=item['quantity'], amount=amount))
+        lines.append(self.rule)
+        lines.append(self.total_line.format(label='Subtotal', amount=subtotal))
+        lines.append(self.total_line.format(label='GST', amount=order['gst_amount']))
+        if order.get('discount_amount'):
+            lines.append(self.total_line.format(label='Discount', amount=-order['discount_amount']))
+        lines.append(self.total_line.format(label='TOTAL (Rs.)', amount=order['total_amount']))
+        lines.append(self.footer)
+        return '\n'.join(lines) + '\n'
+
+
+@lru_cache(maxsize=None)
+def get_template(width=RECEIPT_WIDTH):
+    return ReceiptTemplate(width)
+
+
+def render_text(order, width=RECEIPT_WIDTH):
+    """Thermal-printer text for one order"""
+    return get_template(width).render(order)
+
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def render_pdf(text):
+    """One-page PDF with the receipt text in Courier, sized to fit it"""
+    lines = text.rstrip('\n').split('\n')
+    leading = PDF_FONT_SIZE * 1.25
+    width = max(len(line) for line in lines) * PDF_FONT_SIZE * 0.6 + 2 * PDF_MARGIN
+    height = len(lines) * leading + 2 * PDF_MARGIN
+
+    stream = [f'BT /F1 {PDF_FONT_SIZE} Tf {leading:.2f} TL {PDF_MARGIN} {height - PDF_MARGIN - PDF_FONT_SIZE:.2f} Td']
+    stream.extend(f'({_pdf_escape(line)}) Tj T*' for line in lines)
+    stream.append('ET')
+    content = '\n'.join(stream).encode('latin-1', errors='replace')
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width:.2f} {height:.2f}] '
+         f'/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>').encode('ascii'),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>',
+        b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream',
+    ]
+    pdf = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+ORDER_SELECT = '''
+    SELECT id, order_type, total_amount, gst_amount, discount_amount, payment_method, timestamp
+    FROM orders
+'''
+ORDER_KEYS = ('id', 'order_type', 'total_amount', 'gst_amount', 'discount_amount', 'payment_method', 'timestamp')
+
+
+def load_orders(conn, start, end):
+    """Orders with timestamp in [start, end) as dicts with their items"""
+    orders = [
+        dict(zip(ORDER_KEYS, row), items=[])
+        for row in conn.execute(
+            ORDER_SELECT + " WHERE timestamp >= ? AND timestamp < ? ORDER BY id", (start, end)
+        )
+    ]
+    if not orders:
+        return orders
+
+    # One range scan over order_items instead of a query per order
+    by_id = {order['id']: order for order in orders}
+    for order_id, name, quantity, price in conn.execute('''
+            SELECT order_id, item_name, quantity, price
+            FROM order_items
+            WHERE order_id BETWEEN ? AND ?
+            ORDER BY id
+        ''', (orders[0]['id'], orders[-1]['id'])):
+        order = by_id.get(order_id)
+        if order is not None:
+            order['items'].append({'name': name, 'quantity': quantity, 'price': price})
+    return orders
+
+
+def load_order(order_id):
+    """A single saved order, or None"""
+    path = order_database(order_id)
+    if path is None:
+        return None
+    with get_connection(path) as conn:
+        row = conn.execute(ORDER_SELECT + " WHERE id = ?", (order_id,)).fetchone()
+        if row is None:
+            return None
+        items = conn.execute(
+            "SELECT item_name, quantity, price FROM order_items WHERE order_id = ? ORDER BY id", (order_id,)
+        ).fetchall()
+    return dict(zip(ORDER_KEYS, row), items=[
+        {'name': name, 'quantity': quantity, 'price': price} for name, quantity, price in items
+    ])
+
+
+def _write_receipts(task):
+    """Render and save one chunk of orders; runs in a pool worker"""
+    orders, out_dir, formats, width = task
+    written = 0
+    for order in orders:
+        text = render_text(order, width)
+        base = os.path.join(out_dir, f"receipt-{order['id']}")
+        if 'txt' in formats:
+            with open(base + '.txt', 'w', encoding='utf-8') as f:
+                f.write(text)
+            written += 1
+        if 'pdf' in formats:
+            with open(base + '.pdf', 'wb') as f:
+                f.write(render_pdf(text))
+            written += 1
+    return written
+
+
+def render_day(day, out_dir, formats=('pdf',), workers=None, width=RECEIPT_WIDTH):
+    """Re-render every receipt for a day ('YYYY-MM-DD' or date); returns files written"""
+    unknown = set(formats) - set(RECEIPT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown receipt format(s): {', '.join(sorted(unknown))}")
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+
+    # The local day, as a range of stored UTC timestamps
+    start, end = utc_bounds(day)
+    orders = []
+    for path in order_databases(*utc_months(day, day)):
+        with get_connection(path) as conn:
+            orders.extend(load_orders(conn, start, end))
+    os.makedirs(out_dir, exist_ok=True)
+
+    tasks = [
+        (orders[start:start + BATCH_CHUNK], out_dir, tuple(formats), width)
+        for start in range(0, len(orders), BATCH_CHUNK)
+    ]
+    if len(tasks) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return sum(pool.map(_write_receipts, tasks))
+    return sum(_write_receipts(task) for task in tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render printable receipts for saved orders")
+    parser.add_argument('day', nargs='?', help="render every order of this day (YYYY-MM-DD)")
+    parser.add_argument('--order', type=int, help="print the receipt for one order instead")
+    parser.add_argument('--out', default='receipts', help="output directory")
+    parser.add_argument('--format', action='append', dest='formats', choices=RECEIPT_FORMATS,
+                        help="txt and/or pdf (default: pdf)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    parser.add_argument('--width', type=int, default=RECEIPT_WIDTH, help="characters per line")
+    args = parser.parse_args()
+
+    if args.order is not None:
+        order = load_order(args.order)
+        if order is None:
+            print(f"❌ Order #{args.order} not found")
+            return
+        print(render_text(order, args.width))
+        return
+    if not args.day:
+        parser.error("give a day or --order")
+
+    written = render_day(args.day, args.out, args.formats or ('pdf',), args.workers, args.width)
+    print(f"✅ Wrote {written} receipt files to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
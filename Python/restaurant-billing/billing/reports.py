@@ -0,0 +1,156 @@
+"""
+Report queries for the Restaurant Billing System.
+
+All reads come from the rollup tables maintained by order_store.py (see
+schema.py), so they stay fast regardless of how much history exists.
+Date-range analytics read the sales_cube / item_daily_sales tables; dates
+are inclusive 'YYYY-MM-DD' strings (or datetime.date objects) and, like the
+rollups, in the restaurant's local time (see clock.py).
+
+With sharding enabled (see shards.py) each query runs on every month shard
+of the outlet that overlaps the range and the partial results are summed
+here. Item names always come from the outlet's menu, since shards hold no
+menu rows.
+"""
+
+import pandas as pd
+
+from .clock import utc_months
+from .database import get_connection
+from .shards import order_databases
+
+
+def _read_frames(sql, params=(), start=None, end=None):
+    """Run a rollup query on each order database covering [start, end]"""
+    frames = []
+    for path in order_databases(*utc_months(start, end)):
+        with get_connection(path) as conn:
+            frames.append(pd.read_sql_query(sql, conn, params=params))
+    return frames
+
+
+def _combine(frames, keys):
+    """Sum partial results from several shards by their key columns"""
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True).groupby(keys, as_index=False).sum()
+
+
+def _name_items(items):
+    """Replace menu_item_id with item_name, looked up in the (outlet) menu"""
+    item_ids = [int(item_id) for item_id in items['menu_item_id']]
+    names = {}
+    if item_ids:
+        placeholders = ','.join('?' * len(item_ids))
+        with get_connection() as conn:
+            names = dict(conn.execute(
+                f"SELECT id, name FROM menu WHERE id IN ({placeholders})", item_ids
+            ).fetchall())
+    named = items.assign(item_name=[names.get(item_id) for item_id in item_ids])
+    named = named[named['item_name'].notna()]
+    return named[['item_name', 'total_quantity', 'total_revenue']].reset_index(drop=True)
+
+
+def _top_items(items, limit):
+    named = _name_items(items)
+    return named.sort_values('total_quantity', ascending=False, kind='stable').head(limit).reset_index(drop=True)
+
+
+def get_sales_report():
+    """Return (daily_sales, popular_items) DataFrames for the Reports page"""
+    # Daily sales (pre-aggregated in daily_sales)
+    daily_sales = _combine(_read_frames('''
+        SELECT date, orders, revenue
+        FROM daily_sales
+        ORDER BY date DESC
+        LIMIT 7
+    '''), 'date').sort_values('date', ascending=False).head(7).reset_index(drop=True)
+
+    # Most sold items (pre-aggregated in item_sales, named from the menu)
+    popular_items = _top_items(_combine(_read_frames('''
+        SELECT menu_item_id, total_quantity, total_revenue
+        FROM item_sales
+    '''), 'menu_item_id'), 10)
+
+    return daily_sales, popular_items
+
+
+BREAKDOWN_DIMENSIONS = ('payment_method', 'order_type')
+WEEKDAYS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+
+
+def _range(start, end):
+    return (str(start), str(end))
+
+
+def sales_summary(start, end):
+    """Totals for a date range: orders, revenue, gst, discount, avg_order_value"""
+    totals = pd.concat(_read_frames('''
+        SELECT COALESCE(SUM(orders), 0) AS orders, COALESCE(SUM(revenue), 0) AS revenue,
+               COALESCE(SUM(gst), 0) AS gst, COALESCE(SUM(discount), 0) AS discount
+        FROM sales_cube
+        WHERE date BETWEEN ? AND ?
+    ''', _range(start, end), start, end)).sum()
+    orders, revenue = int(totals['orders']), float(totals['revenue'])
+    return {
+        'orders': orders,
+        'revenue': revenue,
+        'gst': float(totals['gst']),
+        'discount': float(totals['discount']),
+        'avg_order_value': revenue / orders if orders else 0.0,
+    }
+
+
+def daily_sales_range(start, end):
+    """One row per day with sales in the range: date, orders, revenue"""
+    return _combine(_read_frames('''
+        SELECT date, SUM(orders) AS orders, SUM(revenue) AS revenue
+        FROM sales_cube
+        WHERE date BETWEEN ? AND ?
+        GROUP BY date
+        ORDER BY date
+    ''', _range(start, end), start, end), 'date').sort_values('date').reset_index(drop=True)
+
+
+def sales_breakdown(start, end, dimension):
+    """Orders and revenue per payment_method or order_type"""
+    if dimension not in BREAKDOWN_DIMENSIONS:
+        raise ValueError(f"Unknown breakdown dimension: {dimension}")
+    return _combine(_read_frames(f'''
+        SELECT {dimension}, SUM(orders) AS orders, SUM(revenue) AS revenue
+        FROM sales_cube
+        WHERE date BETWEEN ? AND ?
+        GROUP BY {dimension}
+        ORDER BY revenue DESC
+    ''', _range(start, end), start, end), dimension).sort_values(
+        'revenue', ascending=False, kind='stable'
+    ).reset_index(drop=True)
+
+
+def hourly_heatmap(start, end, measure='orders'):
+    """Weekday x hour-of-day grid (7 x 24) of orders or revenue"""
+    if measure not in ('orders', 'revenue'):
+        raise ValueError(f"Unknown heatmap measure: {measure}")
+    cells = _combine(_read_frames(f'''
+        SELECT CAST(strftime('%w', date) AS INTEGER) AS weekday, hour, SUM({measure}) AS value
+        FROM sales_cube
+        WHERE date BETWEEN ? AND ?
+        GROUP BY weekday, hour
+    ''', _range(start, end), start, end), ['weekday', 'hour'])
+    grid = (
+        cells.pivot(index='weekday', columns='hour', values='value')
+        .reindex(index=range(7), columns=range(24))
+        .fillna(0)
+    )
+    grid.index = WEEKDAYS
+    return grid
+
+
+def top_items_range(start, end, limit=10):
+    """Best-selling items in the range: item_name, total_quantity, total_revenue"""
+    return _top_items(_combine(_read_frames('''
+        SELECT menu_item_id, SUM(total_quantity) AS total_quantity, SUM(total_revenue) AS total_revenue
+        FROM item_daily_sales
+        WHERE date BETWEEN ? AND ?
+        GROUP BY menu_item_id
+    ''', _range(start, end), start, end), 'menu_item_id'), limit)
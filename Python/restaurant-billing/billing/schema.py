@@ -0,0 +1,464 @@
+"""
+Database schema for the Restaurant Billing System.
+
+Creates the core tables (menu, orders, order_items), the indexes the
+order/report queries need and rollup tables that are updated incrementally
+whenever orders are committed:
+
+    daily_sales(date, orders, revenue)
+    item_sales(menu_item_id, total_quantity, total_revenue)
+    sales_cube(date, hour, order_type, payment_method, orders, revenue, gst, discount)
+    item_daily_sales(date, menu_item_id, total_quantity, total_revenue)
+
+The Reports page reads these few rows instead of grouping the whole order
+history on every visit. Dates and hours are local to the restaurant (see
+clock.py); the UTC offset they were built with is kept in `settings` and
+the rollups are rebuilt if it changes. sales_cube and item_daily_sales hold one row per
+(day, hour, type, payment) and (day, item), so any date range, hourly
+heatmap or payment/order-type breakdown is a small range scan.
+
+Order lines reference the menu by menu_item_id (item_name and price are
+kept as a snapshot of what was billed), and item rollups are keyed by that
+id, so renaming an item does not split its history. Menu items are retired
+(active = 0) rather than deleted for the same reason. Databases created
+before menu_item_id existed are migrated by backfill.py.
+
+The schema is versioned with PRAGMA user_version. MIGRATIONS[n] upgrades a
+database from version n to n + 1, and init_database() applies whatever is
+pending once per process and database file, so Streamlit reruns that call
+it again run no SQL at all. Databases from before versioning report
+version 0; every migration is written to be safe on them.
+"""
+
+import os
+import threading
+
+from .clock import LOCAL_DATE_SQL, LOCAL_HOUR_SQL, LOCAL_MODIFIER, UTC_OFFSET_MINUTES, local_bucket
+from .database import get_connection, get_default_path
+from .menu import invalidate_menu
+
+TABLES_DDL = (
+    '''
+        CREATE TABLE IF NOT EXISTS menu (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            category TEXT NOT NULL,
+            price REAL NOT NULL,
+            gst REAL DEFAULT 5.0,
+            active INTEGER NOT NULL DEFAULT 1
+        )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_type TEXT NOT NULL,
+            total_amount REAL NOT NULL,
+            gst_amount REAL NOT NULL,
+            discount_amount REAL DEFAULT 0,
+            payment_method TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER,
+            menu_item_id INTEGER,
+            item_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            price REAL NOT NULL,
+            total_price REAL NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders (id),
+            FOREIGN KEY (menu_item_id) REFERENCES menu (id)
+        )
+    ''',
+)
+
+# Columns added after the first release: (table, column, declaration)
+ADDED_COLUMNS = (
+    ('menu', 'active', 'INTEGER NOT NULL DEFAULT 1'),
+    ('order_items', 'menu_item_id', 'INTEGER REFERENCES menu (id)'),
+)
+
+SAMPLE_MENU = [
+    ('Margherita Pizza', 'Pizza', 299.0, 5.0),
+    ('Pepperoni Pizza', 'Pizza', 349.0, 5.0),
+    ('Chicken Burger', 'Burger', 199.0, 5.0),
+    ('Veg Burger', 'Burger', 149.0, 5.0),
+    ('Pasta Carbonara', 'Pasta', 249.0, 5.0),
+    ('Caesar Salad', 'Salad', 179.0, 5.0),
+    ('Chicken Wings', 'Appetizer', 299.0, 5.0),
+    ('French Fries', 'Appetizer', 99.0, 5.0),
+    ('Coca Cola', 'Beverage', 49.0, 5.0),
+    ('Coffee', 'Beverage', 79.0, 5.0)
+]
+
+REPORTING_DDL = (
+    "CREATE INDEX IF NOT EXISTS idx_orders_timestamp ON orders (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id)",
+    "CREATE INDEX IF NOT EXISTS idx_order_items_menu_item_id ON order_items (menu_item_id)",
+    # Item aggregation is keyed by menu_item_id now
+    "DROP INDEX IF EXISTS idx_order_items_item_name",
+    '''
+        CREATE TABLE IF NOT EXISTS daily_sales (
+            date TEXT PRIMARY KEY,
+            orders INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0
+        )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS item_sales (
+            menu_item_id INTEGER PRIMARY KEY,
+            total_quantity INTEGER NOT NULL DEFAULT 0,
+            total_revenue REAL NOT NULL DEFAULT 0
+        )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_item_sales_quantity ON item_sales (total_quantity)",
+    '''
+        CREATE TABLE IF NOT EXISTS sales_cube (
+            date TEXT NOT NULL,
+            hour INTEGER NOT NULL,
+            order_type TEXT NOT NULL,
+            payment_method TEXT NOT NULL,
+            orders INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            gst REAL NOT NULL DEFAULT 0,
+            discount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, hour, order_type, payment_method)
+        ) WITHOUT ROWID
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS item_daily_sales (
+            date TEXT NOT NULL,
+            menu_item_id INTEGER NOT NULL,
+            total_quantity INTEGER NOT NULL DEFAULT 0,
+            total_revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, menu_item_id)
+        ) WITHOUT ROWID
+    ''',
+)
+
+# Bumped on every menu change by any connection or process, so menu caches
+# (menu.py, the API's ETag) can tell when to reload
+MENU_REVISION_DDL = (
+    '''
+        CREATE TABLE IF NOT EXISTS menu_revision (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            revision INTEGER NOT NULL
+        )
+    ''',
+    "INSERT OR IGNORE INTO menu_revision (id, revision) VALUES (1, 0)",
+) + tuple(
+    f'''
+        CREATE TRIGGER IF NOT EXISTS menu_revision_{event.lower()} AFTER {event} ON menu
+        BEGIN
+            UPDATE menu_revision SET revision = revision + 1 WHERE id = 1;
+        END
+    '''
+    for event in ('INSERT', 'UPDATE', 'DELETE')
+)
+
+ROLLUP_TABLES = ('daily_sales', 'item_sales', 'sales_cube', 'item_daily_sales')
+ITEM_ROLLUP_TABLES = ('item_sales', 'item_daily_sales')
+
+UPSERT_DAILY_SALES = '''
+    INSERT INTO daily_sales (date, orders, revenue)
+    VALUES (?, ?, ?)
+    ON CONFLICT (date) DO UPDATE SET
+        orders = orders + excluded.orders,
+        revenue = revenue + excluded.revenue
+'''
+
+UPSERT_ITEM_SALES = '''
+    INSERT INTO item_sales (menu_item_id, total_quantity, total_revenue)
+    VALUES (?, ?, ?)
+    ON CONFLICT (menu_item_id) DO UPDATE SET
+        total_quantity = total_quantity + excluded.total_quantity,
+        total_revenue = total_revenue + excluded.total_revenue
+'''
+
+UPSERT_SALES_CUBE = '''
+    INSERT INTO sales_cube (date, hour, order_type, payment_method, orders, revenue, gst, discount)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (date, hour, order_type, payment_method) DO UPDATE SET
+        orders = orders + excluded.orders,
+        revenue = revenue + excluded.revenue,
+        gst = gst + excluded.gst,
+        discount = discount + excluded.discount
+'''
+
+UPSERT_ITEM_DAILY_SALES = '''
+    INSERT INTO item_daily_sales (date, menu_item_id, total_quantity, total_revenue)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (date, menu_item_id) DO UPDATE SET
+        total_quantity = total_quantity + excluded.total_quantity,
+        total_revenue = total_revenue + excluded.total_revenue
+'''
+
+# Full-history aggregations used by rebuild_rollups(), in local time
+DAILY_SALES_SELECT = f'''
+    SELECT {LOCAL_DATE_SQL}, COUNT(*), SUM(total_amount)
+    FROM orders
+'''
+
+SALES_CUBE_SELECT = f'''
+    SELECT {LOCAL_DATE_SQL}, {LOCAL_HOUR_SQL}, order_type, payment_method,
+           COUNT(*), SUM(total_amount), SUM(gst_amount), SUM(discount_amount)
+    FROM orders
+'''
+
+ITEM_DAILY_SELECT = f'''
+    SELECT DATE(o.timestamp, {LOCAL_MODIFIER}), i.menu_item_id, SUM(i.quantity), SUM(i.total_price)
+    FROM order_items i
+    JOIN orders o ON o.id = i.order_id
+    WHERE i.menu_item_id IS NOT NULL
+'''
+
+SETTINGS_DDL = '''
+    CREATE TABLE IF NOT EXISTS settings (
+        name TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+'''
+ROLLUP_OFFSET_SETTING = 'rollup_utc_offset_minutes'
+
+
+_initialized = set()  # database files already migrated by this process
+_init_lock = threading.Lock()
+
+
+def init_database(db_path=None, seed_menu=True):
+    """Bring the schema up to date and seed the sample menu if it is empty
+
+    Only the first call per process and database file touches the database;
+    later calls return immediately. Returns True when the sample menu was
+    inserted. Order shards (see shards.py) pass seed_menu=False since their
+    menu table stays unused.
+    """
+    key = os.path.abspath(db_path or get_default_path())
+    if key in _initialized:
+        return False
+
+    with _init_lock:
+        if key in _initialized:
+            return False
+        with get_connection(db_path) as conn:
+            migrate(conn)
+            check_rollup_offset(conn)
+
+            # Insert sample menu items if table is empty
+            seeded = False
+            if seed_menu:
+                seeded = conn.execute("SELECT COUNT(*) FROM menu").fetchone()[0] == 0
+            if seeded:
+                conn.executemany(
+                    "INSERT INTO menu (name, category, price, gst) VALUES (?, ?, ?, ?)",
+                    SAMPLE_MENU
+                )
+        _initialized.add(key)
+
+    if seeded:
+        invalidate_menu()
+    return seeded
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending MIGRATIONS in one transaction; returns the versions applied"""
+    if schema_version(conn) == SCHEMA_VERSION:
+        return []
+
+    # Take the write lock first so concurrent processes migrate only once
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        current = schema_version(conn)
+        if current > SCHEMA_VERSION:
+            raise RuntimeError(
+                f"Database schema version {current} is newer than this code ({SCHEMA_VERSION})"
+            )
+        cursor = conn.cursor()
+        applied = []
+        for version in range(current, SCHEMA_VERSION):
+            MIGRATIONS[version](cursor)
+            applied.append(version + 1)
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
+
+
+def check_rollup_offset(conn):
+    """Rebuild the rollups if they were bucketed with another UTC offset"""
+    query = "SELECT value FROM settings WHERE name = ?"
+    row = conn.execute(query, (ROLLUP_OFFSET_SETTING,)).fetchone()
+    if row is not None and int(row[0]) == UTC_OFFSET_MINUTES:
+        return False
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(query, (ROLLUP_OFFSET_SETTING,)).fetchone()
+        rebuilt = row is None or int(row[0]) != UTC_OFFSET_MINUTES
+        if rebuilt:
+            localize_rollups(conn.cursor())
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return rebuilt
+
+
+def create_core_tables(cursor):
+    """Version 1: menu, orders and order_items, plus columns older copies lack"""
+    for statement in TABLES_DDL:
+        cursor.execute(statement)
+    add_missing_columns(cursor)
+
+
+def table_columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def add_missing_columns(cursor):
+    """ALTER older databases to add the columns in ADDED_COLUMNS"""
+    for table, column, declaration in ADDED_COLUMNS:
+        if column not in table_columns(cursor, table):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def apply_reporting_schema(cursor):
+    """Create indexes and rollup tables; backfill rollups the first time"""
+    # Item rollups used to be keyed by item_name; they are rebuilt by id
+    columns = table_columns(cursor, 'item_sales')
+    if columns and 'menu_item_id' not in columns:
+        for table in ITEM_ROLLUP_TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+    placeholders = ','.join('?' * len(ROLLUP_TABLES))
+    cursor.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ({placeholders})",
+        ROLLUP_TABLES
+    )
+    needs_backfill = cursor.fetchone()[0] < len(ROLLUP_TABLES)
+
+    for statement in REPORTING_DDL:
+        cursor.execute(statement)
+
+    if needs_backfill:
+        rebuild_rollups(cursor)
+
+
+def add_menu_revision(cursor):
+    """Version 3: trigger-maintained menu_revision counter"""
+    for statement in MENU_REVISION_DDL:
+        cursor.execute(statement)
+
+
+def localize_rollups(cursor):
+    """Version 4: rebuild the rollups by local date and hour (see clock.py)"""
+    cursor.execute(SETTINGS_DDL)
+    rebuild_rollups(cursor)
+    cursor.execute(
+        "INSERT INTO settings (name, value) VALUES (?, ?) "
+        "ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+        (ROLLUP_OFFSET_SETTING, str(UTC_OFFSET_MINUTES))
+    )
+
+
+# MIGRATIONS[n] takes a cursor inside the migration transaction and
+# upgrades version n to n + 1. Append new steps; never edit shipped ones.
+MIGRATIONS = (
+    create_core_tables,
+    apply_reporting_schema,  # version 2: report indexes and rollup tables
+    add_menu_revision,
+    localize_rollups,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def rebuild_rollups(cursor):
+    """Recompute every rollup table from the full order history"""
+    cursor.execute("DELETE FROM daily_sales")
+    cursor.execute("INSERT INTO daily_sales (date, orders, revenue)" + DAILY_SALES_SELECT + " GROUP BY 1")
+    cursor.execute("DELETE FROM item_sales")
+    cursor.execute('''
+        INSERT INTO item_sales (menu_item_id, total_quantity, total_revenue)
+        SELECT menu_item_id, SUM(quantity), SUM(total_price)
+        FROM order_items
+        WHERE menu_item_id IS NOT NULL
+        GROUP BY menu_item_id
+    ''')
+    cursor.execute("DELETE FROM sales_cube")
+    cursor.execute(
+        "INSERT INTO sales_cube (date, hour, order_type, payment_method, orders, revenue, gst, discount)"
+        + SALES_CUBE_SELECT + " GROUP BY 1, 2, 3, 4"
+    )
+    cursor.execute("DELETE FROM item_daily_sales")
+    cursor.execute(
+        "INSERT INTO item_daily_sales (date, menu_item_id, total_quantity, total_revenue)"
+        + ITEM_DAILY_SELECT + " GROUP BY 1, 2"
+    )
+
+
+def update_rollups(cursor, orders, item_rows):
+    """Fold newly inserted orders into the rollups (same transaction)
+
+    `orders` are (order_id, timestamp, order_type, payment_method,
+    total_amount, gst_amount, discount_amount) tuples and `item_rows` the
+    (order_id, menu_item_id, item_name, quantity, price, total_price)
+    tuples written to order_items for them. Orders are bucketed by their
+    local date and hour. The totals are summed from
+    these rows rather than re-read from the tables, so batches whose ids
+    are not contiguous are counted exactly once. Lines without a
+    menu_item_id are left out of the item rollups.
+    """
+    dates = {}
+    daily = {}
+    cube = {}
+    for order_id, timestamp, order_type, payment_method, total, gst, discount in orders:
+        date, hour = local_bucket(timestamp)
+        dates[order_id] = date
+        count, revenue = daily.get(date, (0, 0.0))
+        daily[date] = (count + 1, revenue + total)
+        key = (date, hour, order_type, payment_method)
+        count, revenue, gst_sum, discount_sum = cube.get(key, (0, 0.0, 0.0, 0.0))
+        cube[key] = (count + 1, revenue + total, gst_sum + gst, discount_sum + (discount or 0))
+
+    cursor.executemany(
+        UPSERT_DAILY_SALES,
+        [(date, count, revenue) for date, (count, revenue) in daily.items()]
+    )
+    cursor.executemany(UPSERT_SALES_CUBE, [key + totals for key, totals in cube.items()])
+    add_item_rollups(cursor, [
+        (dates[order_id], menu_item_id, quantity, total_price)
+        for order_id, menu_item_id, _, quantity, _, total_price in item_rows
+        if menu_item_id is not None
+    ])
+
+
+def add_item_rollups(cursor, lines):
+    """Fold existing order lines into the item rollups
+
+    Used when lines gain a menu_item_id after they were written (see
+    backfill.py). `lines` are (date, menu_item_id, quantity, total_price).
+    """
+    totals = {}
+    daily = {}
+    for date, menu_item_id, quantity, total_price in lines:
+        quantity_sum, revenue_sum = totals.get(menu_item_id, (0, 0.0))
+        totals[menu_item_id] = (quantity_sum + quantity, revenue_sum + total_price)
+        quantity_sum, revenue_sum = daily.get((date, menu_item_id), (0, 0.0))
+        daily[(date, menu_item_id)] = (quantity_sum + quantity, revenue_sum + total_price)
+    cursor.executemany(
+        UPSERT_ITEM_SALES,
+        [(item_id, quantity, revenue) for item_id, (quantity, revenue) in totals.items()]
+    )
+    cursor.executemany(
+        UPSERT_ITEM_DAILY_SALES,
+        [(date, item_id, quantity, revenue) for (date, item_id), (quantity, revenue) in daily.items()]
+    )
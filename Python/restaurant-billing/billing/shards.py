@@ -0,0 +1,189 @@
+"""
+Per-outlet, per-month database shards for the Restaurant Billing System.
+
+Instead of one ever-growing restaurant.db, every outlet gets a directory
+under a shared root:
+
+    <root>/<outlet>/restaurant.db        the outlet's menu
+    <root>/<outlet>/orders-YYYY-MM.db    orders, order lines and rollups for one month
+
+enable_sharding() points the default connection at the outlet's menu
+database and installs a ShardRouter in order_store, so every commit path
+(plain, group commit, commit_orders) writes each order into the shard for
+the month of its timestamp. The database taking writes therefore only ever
+holds one month of one outlet; chain-wide reports fan out over the shards
+in federation.py.
+
+Reads of the active outlet's orders (reports.py, receipts.py, export.py)
+ask order_databases() / order_database() which files to open, so they
+follow the router as well.
+
+Order ids stay unique within an outlet because each month shard starts its
+AUTOINCREMENT sequence at YYYYMM * ORDER_ID_STRIDE.
+"""
+
+import os
+import re
+import threading
+
+from . import order_store
+from .database import get_connection, get_default_path, set_default_path
+from .menu import invalidate_menu, resolve_menu_ids
+from .schema import init_database
+
+MENU_DB = 'restaurant.db'
+SHARD_PATTERN = re.compile(r'^orders-(\d{4}-\d{2})\.db$')
+ORDER_ID_STRIDE = 1000000  # orders per outlet per month before ids overlap
+
+
+def shard_name(month):
+    return f'orders-{month}.db'
+
+
+def list_outlets(root):
+    """Outlet directories under root, sorted by name"""
+    if not os.path.isdir(root):
+        return []
+    return sorted(entry.name for entry in os.scandir(root) if entry.is_dir())
+
+
+def list_shards(root, outlet, first_month=None, last_month=None):
+    """Sorted (month, path) pairs for an outlet, optionally within a month range"""
+    directory = os.path.join(root, outlet)
+    if not os.path.isdir(directory):
+        return []
+    shards = []
+    for entry in os.scandir(directory):
+        match = SHARD_PATTERN.match(entry.name)
+        if not match:
+            continue
+        month = match.group(1)
+        if (first_month and month < first_month) or (last_month and month > last_month):
+            continue
+        shards.append((month, entry.path))
+    return sorted(shards)
+
+
+def order_databases(first_month=None, last_month=None):
+    """Database files holding orders between two months ('YYYY-MM', inclusive)
+
+    Without sharding this is just the default database. With sharding it is
+    the outlet's month shards, or the outlet database (same tables, no
+    orders) when none fall in the range, so there is always one to query.
+    """
+    router = order_store.get_router()
+    if router is None:
+        return [get_default_path()]
+    shards = list_shards(router.root, router.outlet, first_month, last_month)
+    return [path for _, path in shards] or [router.menu_path]
+
+
+def order_database(order_id):
+    """Database file holding an order id, or None if no such shard exists"""
+    router = order_store.get_router()
+    if router is None:
+        return get_default_path()
+    yyyymm = str(order_id // ORDER_ID_STRIDE)
+    path = router.shard_path(f'{yyyymm[:4]}-{yyyymm[4:]}')
+    return path if os.path.exists(path) else None
+
+
+class ShardRouter:
+    """Writes one outlet's orders to the shard for their month"""
+
+    def __init__(self, root, outlet):
+        self.root = root
+        self.outlet = outlet
+        self.directory = os.path.join(root, outlet)
+        self.menu_path = os.path.join(self.directory, MENU_DB)
+        self._ready = set()
+        self._lock = threading.Lock()
+
+    def shard_path(self, month):
+        return os.path.join(self.directory, shard_name(month))
+
+    def ensure_shard(self, month):
+        """Create the month's shard on first use in this process; returns its path"""
+        path = self.shard_path(month)
+        with self._lock:
+            if path not in self._ready:
+                init_database(path, seed_menu=False)
+                with get_connection(path) as conn:
+                    conn.execute(
+                        "INSERT INTO sqlite_sequence (name, seq) SELECT 'orders', ? "
+                        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'orders')",
+                        (int(month.replace('-', '')) * ORDER_ID_STRIDE,)
+                    )
+                self._ready.add(path)
+        return path
+
+    def write(self, orders):
+        """Write orders to their month shards; returns ids in input order
+
+        Orders for the same month share one transaction; a batch spanning
+        several months is committed shard by shard.
+        """
+        orders = self._prepare(orders)
+        by_month = {}
+        for index, order in enumerate(orders):
+            by_month.setdefault(order['timestamp'][:7], []).append(index)
+
+        order_ids = [None] * len(orders)
+        for month, indexes in sorted(by_month.items()):
+            path = self.ensure_shard(month)
+            with get_connection(path) as conn:
+                written = order_store.write_orders(conn, [orders[i] for i in indexes])
+            for index, order_id in zip(indexes, written):
+                order_ids[index] = order_id
+        return order_ids
+
+    def _prepare(self, orders):
+        """Fix each order's timestamp and resolve menu ids against the outlet menu"""
+        now = order_store.utc_timestamp()
+        prepared = [dict(order, timestamp=order.get('timestamp') or now) for order in orders]
+
+        # Shards have no menu rows, so name-only items are matched here
+        names = [
+            item['name'] for order in prepared for item in order['items'] if item.get('menu_item_id') is None
+        ]
+        if names:
+            with get_connection(self.menu_path) as conn:
+                menu_ids = resolve_menu_ids(conn, names)
+            for order in prepared:
+                order['items'] = [
+                    item if item.get('menu_item_id') is not None
+                    else dict(item, menu_item_id=menu_ids.get(item['name']))
+                    for item in order['items']
+                ]
+        return prepared
+
+
+_previous_path = None
+
+
+def enable_sharding(root, outlet):
+    """Use <root>/<outlet>/ for this process: its menu database plus month shards"""
+    global _previous_path
+    if order_store.get_ingest() is not None:
+        raise RuntimeError("Disable async ingest before enabling sharding")
+
+    router = ShardRouter(root, outlet)
+    os.makedirs(router.directory, exist_ok=True)
+    if order_store.get_router() is None:
+        _previous_path = get_default_path()
+    set_default_path(router.menu_path)
+    init_database()
+    invalidate_menu()
+    order_store.set_router(router)
+    return router
+
+
+def disable_sharding():
+    """Go back to the single database that was in use before enable_sharding()"""
+    global _previous_path
+    if order_store.get_router() is None:
+        return
+    order_store.set_router(None)
+    set_default_path(_previous_path)
+    _previous_path = None
+    invalidate_menu()
@@ -0,0 +1,244 @@
+"""
+Replay simulator for the Restaurant Billing System.
+
+Pushes recorded bills (sample_bills.json by default) through the billing
+core the way the till does - price the items with compute_bill(), then save
+the order with commit_order() - from several concurrent workers, and
+reports:
+  - latency percentiles for pricing + saving each bill
+  - throughput achieved versus the requested rate
+  - bills whose computed GST or total differs from the recorded
+    gst_amount / total_amount (a correctness check for the bill math)
+
+--scale replays the file many times over (cycling through the bills and
+shifting timestamps forward a minute per bill), generated lazily so
+millions of bills need no extra memory. It runs against a scratch database
+unless --db is given:
+
+    python simulate.py --scale 100000 --workers 8 --rate 2000
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmark import percentiles
+from billing import database, order_store
+from billing.bill import DEFAULT_GST, compute_bill, from_paise
+from billing.menu import get_menu_items
+from billing.schema import init_database
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+MAX_MISMATCHES = 20  # examples kept in the report
+
+
+def load_bills(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def scaled_bills(bills, scale):
+    """Yield len(bills) * scale bills, spreading copies out in time"""
+    for index, bill in enumerate(itertools.islice(itertools.cycle(bills), len(bills) * scale)):
+        if index < len(bills):
+            yield bill
+            continue
+        timestamp = datetime.strptime(bill['timestamp'], TIMESTAMP_FORMAT) + timedelta(minutes=index)
+        yield dict(bill, order_id=index + 1, timestamp=timestamp.strftime(TIMESTAMP_FORMAT))
+
+
+def cart_items(bill, menu):
+    """Bill items as Cart.items() would return them, ids and GST from the menu"""
+    items = []
+    for item in bill['items']:
+        menu_item = menu.get(item['name'])
+        items.append({
+            'menu_item_id': menu_item['id'] if menu_item else None,
+            'name': item['name'],
+            'price': item['price'],
+            'quantity': item['quantity'],
+            'gst': menu_item['gst'] if menu_item else DEFAULT_GST,
+        })
+    return items
+
+
+def check_bill(bill, totals):
+    """Return a mismatch record, or None if the computed bill agrees"""
+    gst = from_paise(totals.gst)
+    total = from_paise(totals.final_total)
+    if abs(gst - bill['gst_amount']) < 0.005 and abs(total - bill['total_amount']) < 0.005:
+        return None
+    return {
+        'order_id': bill.get('order_id'),
+        'expected_gst': bill['gst_amount'],
+        'computed_gst': gst,
+        'expected_total': bill['total_amount'],
+        'computed_total': total,
+    }
+
+
+class Replay:
+    """Shared state for the replay workers"""
+
+    def __init__(self, bills, menu, rate):
+        self.bills = bills
+        self.menu = menu
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = None
+        self.latencies = []
+        self.mismatches = []
+        self.mismatch_count = 0
+        self.errors = []
+        self.expected_revenue = 0.0
+        self.computed_revenue = 0.0
+
+    def take(self):
+        """Next bill and the time it is due (None when the replay is over)"""
+        with self.lock:
+            bill = next(self.bills, None)
+            if bill is None:
+                return None, None
+            now = time.perf_counter()
+            if self.next_slot is None:
+                self.next_slot = now
+            due = self.next_slot
+            self.next_slot += self.interval
+            return bill, due
+
+    def worker(self):
+        latencies = []
+        while True:
+            bill, due = self.take()
+            if bill is None:
+                break
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            start = time.perf_counter()
+            items = cart_items(bill, self.menu)
+            totals = compute_bill(items, bill.get('discount', 0.0))
+            order = order_store.make_order(
+                bill['order_type'], items, from_paise(totals.final_total), from_paise(totals.gst),
+                bill['payment_method'], from_paise(totals.discount), bill.get('timestamp')
+            )
+            try:
+                order_store.commit_order(order)
+            except sqlite3.Error as e:
+                with self.lock:
+                    self.errors.append(str(e))
+                continue
+            latencies.append(time.perf_counter() - start)
+
+            mismatch = check_bill(bill, totals)
+            with self.lock:
+                self.expected_revenue += bill['total_amount']
+                self.computed_revenue += from_paise(totals.final_total)
+                if mismatch:
+                    self.mismatch_count += 1
+                    if len(self.mismatches) < MAX_MISMATCHES:
+                        self.mismatches.append(mismatch)
+
+        with self.lock:
+            self.latencies.extend(latencies)
+
+
+def replay(bills, workers, rate=None, group_commit=False):
+    """Replay an iterable of bills against the current default database"""
+    menu = {item['name']: item for item in get_menu_items()[['id', 'name', 'gst']].to_dict('records')}
+    state = Replay(iter(bills), menu, rate)
+
+    if group_commit:
+        order_store.enable_group_commit()
+    threads = [threading.Thread(target=state.worker) for _ in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if group_commit:
+        order_store.disable_group_commit()
+
+    count = len(state.latencies)
+    return {
+        'bills': count,
+        'errors': len(state.errors),
+        'elapsed_sec': round(elapsed, 3),
+        'bills_per_sec': round(count / elapsed, 1) if elapsed else None,
+        'target_bills_per_sec': rate,
+        'latency': percentiles(state.latencies) if count else None,
+        'correctness': {
+            'mismatched_bills': state.mismatch_count,
+            'expected_revenue': round(state.expected_revenue, 2),
+            'computed_revenue': round(state.computed_revenue, 2),
+            'examples': state.mismatches,
+        },
+    }
+
+
+def run(args):
+    bills = load_bills(args.bills)
+    workdir = None
+    previous_path = database.get_default_path()
+    if args.db:
+        database.set_default_path(args.db)
+    else:
+        workdir = tempfile.mkdtemp(prefix='billing-replay-')
+        database.set_default_path(os.path.join(workdir, 'replay.db'))
+    try:
+        init_database()
+        results = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'environment': {
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+            },
+            'parameters': vars(args),
+            'replay': replay(scaled_bills(bills, args.scale), args.workers, args.rate, args.group_commit),
+        }
+    finally:
+        database.close_all()
+        database.set_default_path(previous_path)
+        if workdir:
+            for name in os.listdir(workdir):
+                os.remove(os.path.join(workdir, name))
+            os.rmdir(workdir)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded bills through the billing core")
+    parser.add_argument('--bills', default='sample_bills.json', help="JSON list of recorded bills")
+    parser.add_argument('--scale', type=int, default=1, help="replay the file this many times")
+    parser.add_argument('--workers', type=int, default=4, help="concurrent tills")
+    parser.add_argument('--rate', type=float, help="target bills per second across all workers (default: unthrottled)")
+    parser.add_argument('--group-commit', action='store_true', help="save orders through the group-commit writer")
+    parser.add_argument('--db', help="database to write to (default: a scratch database)")
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Replay results written to {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
+
+    if results['replay']['correctness']['mismatched_bills']:
+        print("⚠️  Some bills did not match their recorded totals", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,24 +3,67 @@ Test script for Restaurant Billing System
 This script demonstrates the core functionality of the billing system.
 """
 
+import io
+import json
+import os
+import shutil
 import sqlite3
+import tempfile
+import time
 import pandas as pd
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from wsgiref.util import setup_testing_defaults
+
+import api
+from billing import commit_orders, compute_bill, from_paise, make_order, to_paise
+from billing import Cart, checkout, commit_order, database, get_menu_items, init_database, invalidate_menu
+from billing.backfill import backfill_menu_item_ids
+from billing.federation import federated_sales_report
+from billing.ingest import ID_BLOCK_SIZE, IngestFailed, IngestQueueFull, OrderIngest, _is_busy
+from billing.menu import menu_revision
+from billing.menu_sync import import_menu
+from billing.order_store import write_orders
+from billing.schema import SCHEMA_VERSION, schema_version
+from billing.profiling import PROFILE_LOG, PROFILE_SAMPLE_RATE, configure, finish_rerun, profiled, start_rerun
+from billing.clock import LOCAL_MODIFIER, UTC_OFFSET, utc_bounds
+from billing.export import ExportUnavailable, export_history, export_history_to_tempfile
+from billing.receipts import load_order, render_day, render_pdf, render_text
+from billing.reports import daily_sales_range, sales_summary, top_items_range
+from billing.shards import disable_sharding, enable_sharding
+
+@contextmanager
+def temp_database(prefix):
+    """Point the default database at a fresh, initialised file for one test"""
+    workdir = tempfile.mkdtemp(prefix=prefix)
+    previous_path = database.get_default_path()
+    database.set_default_path(os.path.join(workdir, 'restaurant.db'))
+    try:
+        init_database()
+        yield database.get_default_path()
+    finally:
+        database.close_all()
+        database.set_default_path(previous_path)
+        invalidate_menu()
+        shutil.rmtree(workdir, ignore_errors=True)
 
 def test_database_connection():
     """Test database connection and table creation"""
-    try:
-        conn = sqlite3.connect('restaurant.db')
+    with temp_database('billing-connection-') as db_path:
+        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
         # Check if tables exist
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-        print("✅ Database tables:", [table[0] for table in tables])
+        tables = [table[0] for table in cursor.fetchall()]
+        assert {'menu', 'orders', 'order_items'} <= set(tables), tables
+        print("✅ Database tables:", tables)
         
         # Check menu items
         cursor.execute("SELECT COUNT(*) FROM menu")
         menu_count = cursor.fetchone()[0]
+        assert menu_count > 0, "sample menu was not seeded"
         print(f"✅ Menu items count: {menu_count}")
         
         # Check orders
@@ -29,17 +72,14 @@ def test_database_connection():
         print(f"✅ Orders count: {orders_count}")
         
         conn.close()
-        return True
-    except Exception as e:
-        print(f"❌ Database test failed: {e}")
-        return False
 
 def test_menu_data():
     """Test menu data retrieval"""
-    try:
-        conn = sqlite3.connect('restaurant.db')
+    with temp_database('billing-menu-data-') as db_path:
+        conn = sqlite3.connect(db_path)
         df = pd.read_sql_query("SELECT * FROM menu ORDER BY category, name", conn)
         conn.close()
+        assert not df.empty, "menu is empty"
         
         print("✅ Menu data retrieved successfully")
         print(f"   Total items: {len(df)}")
@@ -49,96 +89,176 @@ def test_menu_data():
         print("\n📋 Sample Menu Items:")
         for _, item in df.head(5).iterrows():
             print(f"   • {item['name']} ({item['category']}) - ₹{item['price']}")
-        
-        return True
-    except Exception as e:
-        print(f"❌ Menu data test failed: {e}")
-        return False
 
 def test_bill_calculation():
     """Test bill calculation logic"""
+    # Sample order items
+    order_items = [
+        {'name': 'Margherita Pizza', 'price': 299.0, 'quantity': 2},
+        {'name': 'Coca Cola', 'price': 49.0, 'quantity': 2}
+    ]
+    
+    # Calculate bill
+    subtotal = sum(item['price'] * item['quantity'] for item in order_items)
+    gst_rate = 5.0
+    gst_amount = subtotal * (gst_rate / 100)
+    total = subtotal + gst_amount
+    
+    print("✅ Bill calculation test:")
+    print(f"   Subtotal: ₹{subtotal:.2f}")
+    print(f"   GST (5%): ₹{gst_amount:.2f}")
+    print(f"   Total: ₹{total:.2f}")
+    
+    # Integer-paise engine must agree exactly
+    bill = compute_bill(order_items)
+    assert bill.subtotal == to_paise(subtotal)
+    assert bill.gst == to_paise(gst_amount)
+    assert from_paise(bill.total) == 730.8
+    
+    # Per-item GST rates and discount
+    mixed = [
+        {'name': 'Coffee', 'price': 79.0, 'quantity': 3, 'gst': 5.0},
+        {'name': 'Wine', 'price': 0.1, 'quantity': 3, 'gst': 18.0}
+    ]
+    bill = compute_bill(mixed, discount=10)
+    assert bill.subtotal == 23730
+    assert bill.gst == 1190
+    assert bill.final_total == 23730 + 1190 - 1000
+    print("   Paise engine: exact totals with per-item GST")
+
+def test_cart():
+    """Test the cart: merge and remove by menu id, cleared by checkout"""
+    workdir = tempfile.mkdtemp(prefix='billing-cart-')
+    previous_path = database.get_default_path()
+    database.set_default_path(os.path.join(workdir, 'cart.db'))
     try:
-        # Sample order items
-        order_items = [
-            {'name': 'Margherita Pizza', 'price': 299.0, 'quantity': 2},
-            {'name': 'Coca Cola', 'price': 49.0, 'quantity': 2}
-        ]
+        init_database()
+        menu = get_menu_items().set_index('name')
+        coffee, fries = int(menu.loc['Coffee', 'id']), int(menu.loc['French Fries', 'id'])
+        
+        cart = Cart()
+        cart.add(coffee, 'Coffee', 79.0, 2)
+        cart.add(fries, 'French Fries', 99.0, 1)
+        cart.add(coffee, 'Coffee', 79.0, 1)  # same id: merged into the first line
+        cart.add(-1, 'Coffee', 89.0, 1)      # same name, different id: its own line
+        assert [(line.item_id, line.quantity) for line in cart] == [(coffee, 3), (fries, 1), (-1, 1)]
         
-        # Calculate bill
-        subtotal = sum(item['price'] * item['quantity'] for item in order_items)
-        gst_rate = 5.0
-        gst_amount = subtotal * (gst_rate / 100)
-        total = subtotal + gst_amount
+        cart.remove(-1)
+        cart.remove(-1)  # removing a missing id is a no-op
+        cart.set_quantity(fries, 0)
+        assert len(cart) == 1 and coffee in cart and fries not in cart
+        cart.set_quantity(coffee, 4)
+        assert cart.items() == [{'menu_item_id': coffee, 'name': 'Coffee', 'price': 79.0, 'quantity': 4, 'gst': 5.0}]
         
-        print("✅ Bill calculation test:")
-        print(f"   Subtotal: ₹{subtotal:.2f}")
-        print(f"   GST (5%): ₹{gst_amount:.2f}")
-        print(f"   Total: ₹{total:.2f}")
+        order_id, bill = checkout(cart, 'Takeaway', 'UPI')
+        assert len(cart) == 0, "checkout must clear the cart"
+        assert from_paise(bill.final_total) == 331.8
+        with database.get_connection() as conn:
+            lines = conn.execute(
+                "SELECT menu_item_id, quantity FROM order_items WHERE order_id = ?", (order_id,)
+            ).fetchall()
+        assert lines == [(coffee, 4)], lines
+        assert checkout(cart, 'Takeaway', 'UPI') == (None, None)
         
-        return True
-    except Exception as e:
-        print(f"❌ Bill calculation test failed: {e}")
-        return False
+        print(f"✅ Cart: lines merged by id, removed by id, cleared after order #{order_id}")
+    finally:
+        database.close_all()
+        database.set_default_path(previous_path)
+        invalidate_menu()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def add_sample_orders():
+    """Commit two sample orders to the default database; returns their ids"""
+    # Sample order 1: Dine-in with multiple items
+    order1 = make_order('Dine-In', [
+        {'name': 'Margherita Pizza', 'quantity': 2, 'price': 299.0},
+        {'name': 'Coca Cola', 'quantity': 2, 'price': 49.0}
+    ], 730.8, 34.8, 'Card')
+    
+    # Sample order 2: Takeaway with discount
+    order2 = make_order('Takeaway', [
+        {'name': 'Chicken Burger', 'quantity': 1, 'price': 199.0},
+        {'name': 'French Fries', 'quantity': 1, 'price': 99.0},
+        {'name': 'Coffee', 'quantity': 1, 'price': 79.0}
+    ], 375.85, 18.85, 'UPI', discount=20.0)
+    
+    # Both orders (and the report rollups) in one transaction
+    return commit_orders([order1, order2])
 
 def test_sample_orders():
     """Test creating sample orders"""
-    try:
-        conn = sqlite3.connect('restaurant.db')
-        cursor = conn.cursor()
+    with temp_database('billing-sample-orders-'):
+        order_ids = add_sample_orders()
+        assert len(order_ids) == 2, order_ids
+        with database.get_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM order_items").fetchone()[0] == 5
         
-        # Sample order 1: Dine-in with multiple items
-        cursor.execute('''
-            INSERT INTO orders (order_type, total_amount, gst_amount, discount_amount, payment_method)
-            VALUES (?, ?, ?, ?, ?)
-        ''', ('Dine-In', 730.8, 34.8, 0.0, 'Card'))
-        
-        order_id = cursor.lastrowid
-        
-        # Add order items
-        sample_items = [
-            ('Margherita Pizza', 2, 299.0, 598.0),
-            ('Coca Cola', 2, 49.0, 98.0)
-        ]
-        
-        for item_name, quantity, price, total_price in sample_items:
-            cursor.execute('''
-                INSERT INTO order_items (order_id, item_name, quantity, price, total_price)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (order_id, item_name, quantity, price, total_price))
-        
-        # Sample order 2: Takeaway with discount
-        cursor.execute('''
-            INSERT INTO orders (order_type, total_amount, gst_amount, discount_amount, payment_method)
-            VALUES (?, ?, ?, ?, ?)
-        ''', ('Takeaway', 375.85, 18.85, 20.0, 'UPI'))
+        print("✅ Sample orders created successfully")
+
+def test_menu_item_references():
+    """Test that order lines reference menu items by id"""
+    with temp_database('billing-references-') as db_path:
+        add_sample_orders()
+        conn = sqlite3.connect(db_path)
+        lines = conn.execute('''
+            SELECT i.item_name, m.name
+            FROM order_items i
+            LEFT JOIN menu m ON m.id = i.menu_item_id
+            WHERE i.order_id = (SELECT MAX(id) FROM orders)
+        ''').fetchall()
+        conn.close()
         
-        order_id2 = cursor.lastrowid
+        assert lines, "no order lines found"
+        assert all(item_name == menu_name for item_name, menu_name in lines), lines
         
-        sample_items2 = [
-            ('Chicken Burger', 1, 199.0, 199.0),
-            ('French Fries', 1, 99.0, 99.0),
-            ('Coffee', 1, 79.0, 79.0)
-        ]
+        print(f"✅ Latest order's {len(lines)} lines reference their menu items")
+
+def test_schema_migrations():
+    """Test upgrading an unversioned database, then a no-op second init"""
+    workdir = tempfile.mkdtemp(prefix='billing-schema-')
+    db_path = os.path.join(workdir, 'legacy.db')
+    configure(log_path=os.path.join(workdir, 'rerun_profile.log'))
+    try:
+        # First-release layout: no menu.active, no order_items.menu_item_id
+        conn = sqlite3.connect(db_path)
+        conn.executescript('''
+            CREATE TABLE menu (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+                               category TEXT NOT NULL, price REAL NOT NULL, gst REAL DEFAULT 5.0);
+            CREATE TABLE orders (id INTEGER PRIMARY KEY AUTOINCREMENT, order_type TEXT NOT NULL,
+                                 total_amount REAL NOT NULL, gst_amount REAL NOT NULL,
+                                 discount_amount REAL DEFAULT 0, payment_method TEXT NOT NULL,
+                                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP);
+            CREATE TABLE order_items (id INTEGER PRIMARY KEY AUTOINCREMENT, order_id INTEGER,
+                                      item_name TEXT NOT NULL, quantity INTEGER NOT NULL,
+                                      price REAL NOT NULL, total_price REAL NOT NULL);
+            INSERT INTO menu (name, category, price) VALUES ('Coffee', 'Beverage', 79.0);
+        ''')
+        conn.close()
         
-        for item_name, quantity, price, total_price in sample_items2:
-            cursor.execute('''
-                INSERT INTO order_items (order_id, item_name, quantity, price, total_price)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (order_id2, item_name, quantity, price, total_price))
+        assert not init_database(db_path), "existing menu must not be reseeded"
+        with database.get_connection(db_path) as conn:
+            assert schema_version(conn) == SCHEMA_VERSION
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(order_items)")}
+            assert 'menu_item_id' in columns
+            assert conn.execute("SELECT active FROM menu").fetchone() == (1,)
         
-        conn.commit()
-        conn.close()
+        # Steady state: a second init runs no SQL at all
+        start_rerun(force=True)
+        init_database(db_path)
+        profile = finish_rerun()
+        assert not profile.sql, profile.sql
         
-        print("✅ Sample orders created successfully")
-        return True
-    except Exception as e:
-        print(f"❌ Sample orders test failed: {e}")
-        return False
+        print(f"✅ Unversioned database migrated to version {SCHEMA_VERSION}; rerun init is free")
+    finally:
+        configure(sample_rate=PROFILE_SAMPLE_RATE, log_path=PROFILE_LOG)
+        database.close_all()
+        shutil.rmtree(workdir, ignore_errors=True)
 
 def test_reports():
     """Test sales reports generation"""
-    try:
-        conn = sqlite3.connect('restaurant.db')
+    with temp_database('billing-reports-') as db_path:
+        add_sample_orders()
+        conn = sqlite3.connect(db_path)
         
         # Daily sales report
         daily_sales = pd.read_sql_query('''
@@ -160,6 +280,9 @@ def test_reports():
         
         conn.close()
         
+        # The rollup tables behind the Reports page agree with a full scan
+        assert not rollup_mismatches(), rollup_mismatches()
+        
         print("✅ Reports generated successfully:")
         print(f"   Daily sales records: {len(daily_sales)}")
         print(f"   Popular items: {len(popular_items)}")
@@ -167,10 +290,518 @@ def test_reports():
         if not daily_sales.empty:
             print(f"   Total revenue: ₹{daily_sales['revenue'].sum():.2f}")
         
-        return True
-    except Exception as e:
-        print(f"❌ Reports test failed: {e}")
-        return False
+
+def test_receipts():
+    """Test thermal text and PDF receipts for a saved order"""
+    with temp_database('billing-receipts-'):
+        order_id = add_sample_orders()[-1]
+        order = load_order(order_id)
+        text = render_text(order)
+        lines = text.splitlines()
+        assert all(len(line) <= 40 for line in lines)
+        assert f"Order #{order_id}" in lines[2]
+        assert any(line.startswith('TOTAL') and line.endswith(f"{order['total_amount']:.2f}") for line in lines)
+        
+        pdf = render_pdf(text)
+        assert pdf.startswith(b'%PDF-') and pdf.rstrip().endswith(b'%%EOF')
+        
+        print(f"✅ Receipt for order #{order_id}: {len(lines)} lines, {len(pdf)} byte PDF")
+
+def call_api(method, path, body=None, headers=None):
+    """Call the WSGI app in-process; returns (status code, headers, JSON or None)"""
+    environ = {'REQUEST_METHOD': method, 'PATH_INFO': path}
+    if body is not None:
+        data = json.dumps(body).encode()
+        environ.update({'CONTENT_LENGTH': str(len(data)), 'wsgi.input': io.BytesIO(data)})
+    environ.update(headers or {})
+    setup_testing_defaults(environ)
+    response = {}
+    
+    def start_response(status, response_headers):
+        response['status'] = int(status.split()[0])
+        response['headers'] = dict(response_headers)
+    
+    payload = b''.join(api.application(environ, start_response))
+    return response['status'], response['headers'], json.loads(payload) if payload else None
+
+def test_api():
+    """Test the HTTP/JSON API: menu ETag, order submit and reports"""
+    with temp_database('billing-api-'):
+        status, headers, menu = call_api('GET', '/menu')
+        assert status == 200 and menu, status
+        status, _, _ = call_api('GET', '/menu', headers={'HTTP_IF_NONE_MATCH': headers['ETag']})
+        assert status == 304, status
+        
+        coffee = next(item for item in menu if item['name'] == 'Coffee')
+        status, _, order = call_api('POST', '/orders', {
+            'order_type': 'Takeaway', 'payment_method': 'UPI',
+            'items': [{'menu_item_id': coffee['id'], 'quantity': 2}],
+        })
+        assert status == 201, order
+        assert order['total'] == round(2 * coffee['price'] * (1 + coffee['gst'] / 100), 2), order
+        
+        status, _, error = call_api('POST', '/orders', {'items': [{'menu_item_id': -1}]})
+        assert status == 400 and 'Unknown menu item' in error['error'], error
+        for discount in ('NaN', '1e400'):
+            status, _, error = call_api('POST', '/orders', {
+                'discount': discount, 'items': [{'menu_item_id': coffee['id']}],
+            })
+            assert status == 400 and 'finite' in error['error'], (discount, error)
+        
+        status, _, summary = call_api('GET', '/reports/summary')
+        assert status == 200 and summary['orders'] >= 1, summary
+        
+        print(f"✅ API: menu 200/304, order #{order['order_id']} = ₹{order['total']:.2f}, reports ok")
+
+def test_sharded_reports():
+    """Test per-outlet month shards and the federated report"""
+    root = tempfile.mkdtemp(prefix='billing-shards-')
+    try:
+        pizza = {'name': 'Margherita Pizza', 'quantity': 1, 'price': 299.0}
+        coffee = {'name': 'Coffee', 'quantity': 2, 'price': 79.0}
+        for outlet in ('north', 'south'):
+            enable_sharding(root, outlet)
+            order_ids = commit_orders([
+                make_order('Dine-In', [pizza], 313.95, 14.95, 'Card', timestamp='2026-01-31 12:00:00'),
+                make_order('Takeaway', [coffee], 165.9, 7.9, 'UPI', timestamp='2026-02-01 09:00:00'),
+            ])
+            disable_sharding()
+            assert order_ids == [202601000001, 202602000001], order_ids
+        
+        report = federated_sales_report(root, workers=2)
+        assert report.outlet_sales['orders'].tolist() == [2, 2]
+        assert round(report.daily_sales['revenue'].sum(), 2) == round(2 * (313.95 + 165.9), 2)
+        items = dict(zip(report.popular_items['item_name'], report.popular_items['total_quantity']))
+        assert items == {'Coffee': 4, 'Margherita Pizza': 2}, items
+        
+        # Only January shards are read for a January range
+        january = federated_sales_report(root, '2026-01-01', '2026-01-31', workers=1)
+        assert january.outlet_sales['orders'].tolist() == [1, 1]
+        
+        # The outlet's own reports, receipts and export read its shards
+        enable_sharding(root, 'north')
+        assert sales_summary('2026-01-01', '2026-02-28')['orders'] == 2
+        assert sales_summary('2026-02-01', '2026-02-28')['revenue'] == 165.9
+        assert daily_sales_range('2026-01-01', '2026-02-28')['date'].tolist() == ['2026-01-31', '2026-02-01']
+        assert top_items_range('2026-01-01', '2026-02-28')['item_name'].tolist() == ['Coffee', 'Margherita Pizza']
+        assert load_order(202602000001)['items'][0]['name'] == 'Coffee'
+        assert load_order(202603000001) is None
+        assert render_day('2026-01-31', os.path.join(root, 'receipts'), ('txt',), workers=1) == 1
+        assert export_history(io.BytesIO()) == 2
+        disable_sharding()
+        
+        print("✅ Sharded writes and federated report agree across 2 outlets x 2 months")
+    finally:
+        disable_sharding()
+        shutil.rmtree(root, ignore_errors=True)
+
+# Each rollup table next to the GROUP BY over the raw orders it summarises,
+# by local date and hour
+ROLLUP_SCANS = {
+    'daily_sales': (
+        "SELECT date, orders, ROUND(revenue, 2) FROM daily_sales",
+        f"SELECT DATE(timestamp, {LOCAL_MODIFIER}), COUNT(*), ROUND(SUM(total_amount), 2) FROM orders GROUP BY 1",
+    ),
+    'item_sales': (
+        "SELECT menu_item_id, total_quantity, ROUND(total_revenue, 2) FROM item_sales",
+        "SELECT menu_item_id, SUM(quantity), ROUND(SUM(total_price), 2) FROM order_items "
+        "WHERE menu_item_id IS NOT NULL GROUP BY 1",
+    ),
+    'sales_cube': (
+        "SELECT date, hour, order_type, payment_method, orders, ROUND(revenue, 2), ROUND(gst, 2), "
+        "ROUND(discount, 2) FROM sales_cube",
+        f"SELECT DATE(timestamp, {LOCAL_MODIFIER}), CAST(strftime('%H', timestamp, {LOCAL_MODIFIER}) AS INTEGER), "
+        "order_type, payment_method, "
+        "COUNT(*), ROUND(SUM(total_amount), 2), ROUND(SUM(gst_amount), 2), ROUND(SUM(discount_amount), 2) "
+        "FROM orders GROUP BY 1, 2, 3, 4",
+    ),
+    'item_daily_sales': (
+        "SELECT date, menu_item_id, total_quantity, ROUND(total_revenue, 2) FROM item_daily_sales",
+        f"SELECT DATE(o.timestamp, {LOCAL_MODIFIER}), i.menu_item_id, SUM(i.quantity), ROUND(SUM(i.total_price), 2) "
+        "FROM order_items i JOIN orders o ON o.id = i.order_id "
+        "WHERE i.menu_item_id IS NOT NULL GROUP BY 1, 2",
+    ),
+}
+
+def rollup_mismatches(db_path=None):
+    """Names of the rollup tables that disagree with a full scan of the orders"""
+    with database.get_connection(db_path) as conn:
+        return [
+            table for table, (rollup, scan) in ROLLUP_SCANS.items()
+            if sorted(conn.execute(rollup).fetchall()) != sorted(conn.execute(scan).fetchall())
+        ]
+
+def test_rollups_out_of_order():
+    """Test rollups after batches whose order ids are not contiguous"""
+    workdir = tempfile.mkdtemp(prefix='billing-rollups-')
+    db_path = os.path.join(workdir, 'rollups.db')
+    coffee = {'name': 'Coffee', 'quantity': 1, 'price': 79.0}
+    try:
+        init_database(db_path)
+        orders = {
+            order_id: dict(make_order('Takeaway', [coffee], 82.95, 3.95, 'UPI',
+                                      timestamp='2026-03-01 12:00:00'), id=order_id)
+            for order_id in (1, 2, 3)
+        }
+        with database.get_connection(db_path) as conn:
+            write_orders(conn, [orders[2]])
+            write_orders(conn, [orders[1], orders[3]])
+            daily = conn.execute("SELECT orders FROM daily_sales").fetchall()
+        assert daily == [(3,)], daily
+        assert not rollup_mismatches(db_path), rollup_mismatches(db_path)
+        
+        print("✅ Rollups match a full scan after writing orders [2] then [1, 3]")
+    finally:
+        database.close_all()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_rollups_match_full_scan():
+    """Test every rollup table against a full scan after writes, migration and backfill"""
+    workdir = tempfile.mkdtemp(prefix='billing-rollup-scan-')
+    db_path = os.path.join(workdir, 'legacy.db')
+    previous_path = database.get_default_path()
+    try:
+        # Pre-rollup history: lines only carry item names, one name is off the menu
+        conn = sqlite3.connect(db_path)
+        conn.executescript('''
+            CREATE TABLE menu (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+                               category TEXT NOT NULL, price REAL NOT NULL, gst REAL DEFAULT 5.0);
+            CREATE TABLE orders (id INTEGER PRIMARY KEY AUTOINCREMENT, order_type TEXT NOT NULL,
+                                 total_amount REAL NOT NULL, gst_amount REAL NOT NULL,
+                                 discount_amount REAL DEFAULT 0, payment_method TEXT NOT NULL,
+                                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP);
+            CREATE TABLE order_items (id INTEGER PRIMARY KEY AUTOINCREMENT, order_id INTEGER,
+                                      item_name TEXT NOT NULL, quantity INTEGER NOT NULL,
+                                      price REAL NOT NULL, total_price REAL NOT NULL);
+            INSERT INTO menu (name, category, price) VALUES ('Coffee', 'Beverage', 79.0),
+                                                            ('Veg Burger', 'Burger', 149.0);
+            INSERT INTO orders (order_type, total_amount, gst_amount, discount_amount, payment_method, timestamp)
+            VALUES ('Dine-In', 239.4, 11.4, 0, 'Cash', '2026-01-10 18:29:00'),
+                   ('Takeaway', 146.45, 6.95, 0, 'UPI', '2026-01-10 18:31:00'),
+                   ('Dine-In', 322.9, 15.9, 11.0, 'Card', '2026-01-11 07:05:00');
+            INSERT INTO order_items (order_id, item_name, quantity, price, total_price)
+            VALUES (1, 'Coffee', 1, 79.0, 79.0), (1, 'Veg Burger', 1, 149.0, 149.0),
+                   (2, 'Masala Dosa', 1, 139.5, 139.5),
+                   (3, 'Coffee', 2, 79.0, 158.0), (3, 'Veg Burger', 1, 149.0, 149.0);
+        ''')
+        conn.close()
+        
+        # Migration builds every rollup from the existing history
+        database.set_default_path(db_path)
+        init_database()
+        assert not rollup_mismatches(), rollup_mismatches()
+        
+        # Backfill links the legacy lines and folds them into the item rollups
+        assert backfill_menu_item_ids(batch_size=2, pause=0) == 5
+        assert not rollup_mismatches(), rollup_mismatches()
+        with database.get_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM item_sales").fetchone()[0] == 3
+        
+        # New writes: single commits, a batch, name-only lines and a discount
+        coffee = {'name': 'Coffee', 'quantity': 3, 'price': 79.0}
+        burger = {'name': 'Veg Burger', 'quantity': 1, 'price': 149.0}
+        commit_order(make_order('Takeaway', [coffee], 248.85, 11.85, 'UPI'))
+        commit_orders([
+            make_order('Dine-In', [coffee, burger], 385.3, 18.3, 'Card', discount=10.0,
+                       timestamp='2026-01-11 20:00:00'),
+            make_order('Dine-In', [burger], 156.45, 7.45, 'Cash', timestamp='2026-01-10 18:30:00'),
+        ])
+        assert not rollup_mismatches(), rollup_mismatches()
+        
+        print("✅ All 4 rollup tables match a full scan after migration, backfill and new orders")
+    finally:
+        database.close_all()
+        database.set_default_path(previous_path)
+        invalidate_menu()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_local_day_boundaries():
+    """Test that report days and hours start at local midnight, not UTC midnight"""
+    workdir = tempfile.mkdtemp(prefix='billing-local-day-')
+    previous_path = database.get_default_path()
+    database.set_default_path(os.path.join(workdir, 'local-day.db'))
+    coffee = {'name': 'Coffee', 'quantity': 1, 'price': 79.0}
+    try:
+        init_database()
+        midnight = datetime.fromisoformat(utc_bounds('2026-03-02')[0])
+        assert midnight == datetime(2026, 3, 2) - UTC_OFFSET
+        before, after = (
+            (midnight + timedelta(seconds=delta)).strftime('%Y-%m-%d %H:%M:%S') for delta in (-1, 0)
+        )
+        commit_orders([
+            make_order('Dine-In', [coffee], 82.95, 3.95, 'Cash', timestamp=before),
+            make_order('Takeaway', [coffee], 82.95, 3.95, 'UPI', timestamp=after),
+        ])
+        
+        daily = daily_sales_range('2026-03-01', '2026-03-02')
+        assert daily['date'].tolist() == ['2026-03-01', '2026-03-02'], daily
+        assert sales_summary('2026-03-02', '2026-03-02')['orders'] == 1
+        with database.get_connection() as conn:
+            hours = conn.execute("SELECT date, hour FROM sales_cube ORDER BY date").fetchall()
+        assert hours == [('2026-03-01', 23), ('2026-03-02', 0)], hours
+        assert not rollup_mismatches()
+        
+        out_dir = os.path.join(workdir, 'receipts')
+        assert render_day('2026-03-02', out_dir, ('txt',), workers=1) == 1
+        assert os.listdir(out_dir) == ['receipt-2.txt'], os.listdir(out_dir)
+        
+        print(f"✅ Local midnight is {midnight} UTC; orders either side land on separate days")
+    finally:
+        database.close_all()
+        database.set_default_path(previous_path)
+        invalidate_menu()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_history_export():
+    """Test chunked history export as CSV, gzipped CSV and Parquet"""
+    workdir = tempfile.mkdtemp(prefix='billing-export-')
+    previous_path = database.get_default_path()
+    database.set_default_path(os.path.join(workdir, 'export.db'))
+    coffee = {'name': 'Coffee', 'quantity': 2, 'price': 79.0}
+    pizza = {'name': 'Margherita Pizza', 'quantity': 1, 'price': 299.0}
+    special = {'name': "Chef's Special", 'quantity': 1, 'price': 250.0}  # not on the menu
+    try:
+        init_database()
+        commit_orders([
+            make_order('Dine-In', [special], 262.5, 12.5, 'Cash'),
+            make_order('Dine-In', [coffee, pizza], 479.85, 22.85, 'Card'),
+            make_order('Takeaway', [coffee], 165.9, 7.9, 'UPI'),
+        ])
+        
+        # chunk_size=1 writes each line as its own chunk; the header appears once
+        out = io.BytesIO()
+        assert export_history(out, 'csv', chunk_size=1) == 4
+        history = pd.read_csv(io.BytesIO(out.getvalue()))
+        assert history['item_name'].tolist() == ["Chef's Special", 'Coffee', 'Margherita Pizza', 'Coffee'], history
+        assert history['order_id'].tolist() == [1, 2, 2, 3]
+        
+        with export_history_to_tempfile('csv.gz', chunk_size=2) as export_file:
+            assert pd.read_csv(export_file, compression='gzip').equals(history)
+        
+        formats = ['csv', 'csv.gz']
+        try:
+            # The first chunk's menu_item_id is all NULL; later chunks still fit its schema
+            out = io.BytesIO()
+            export_history(out, 'parquet', chunk_size=1)
+            parquet = pd.read_parquet(io.BytesIO(out.getvalue()))
+            assert parquet['total_price'].tolist() == [250.0, 158.0, 299.0, 158.0]
+            assert parquet['menu_item_id'].isna().tolist() == [True, False, False, False]
+            formats.append('parquet')
+        except ExportUnavailable:
+            pass  # pyarrow not installed
+        
+        try:
+            export_history(io.BytesIO(), 'xlsx')
+            raise AssertionError("unknown format must be rejected")
+        except ValueError:
+            pass
+        
+        print(f"✅ History export: 4 order lines as {', '.join(formats)}")
+    finally:
+        database.close_all()
+        database.set_default_path(previous_path)
+        invalidate_menu()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_async_ingest():
+    """Test journalled ingest: submit, replay after a failed write and id conflicts"""
+    workdir = tempfile.mkdtemp(prefix='billing-ingest-')
+    db_path = os.path.join(workdir, 'ingest.db')
+    coffee = {'name': 'Coffee', 'quantity': 1, 'price': 79.0}
+    try:
+        init_database(db_path)
+        
+        # Ids come from a reserved block, so a direct AUTOINCREMENT write lands above it
+        ingest = OrderIngest(db_path)
+        ingest.start()
+        first = ingest.submit(make_order('Takeaway', [coffee], 82.95, 3.95, 'UPI'))
+        with database.get_connection(db_path) as conn:
+            [direct] = write_orders(conn, [make_order('Dine-In', [coffee], 82.95, 3.95, 'Cash')])
+        second = ingest.submit(make_order('Takeaway', [coffee], 82.95, 3.95, 'Card'))
+        ingest.stop()
+        assert second == first + 1 and direct > second, (first, second, direct)
+        with database.get_connection(db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 3
+        
+        # submit() never waits on a locked database: it hands out the reserved
+        # block, then reports the queue as full instead of blocking
+        ingest = OrderIngest(db_path)
+        ingest.start()
+        holder = sqlite3.connect(db_path)
+        holder.execute("BEGIN EXCLUSIVE")
+        began = time.monotonic()
+        try:
+            for _ in range(ID_BLOCK_SIZE + 1):
+                ingest.submit(make_order('Takeaway', [coffee], 82.95, 3.95, 'UPI'))
+            raise AssertionError("submit without reserved ids must raise")
+        except IngestQueueFull:
+            pass
+        finally:
+            holder.rollback()
+            holder.close()
+        assert time.monotonic() - began < 1, time.monotonic() - began
+        ingest.stop()
+        with database.get_connection(db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 3 + ID_BLOCK_SIZE
+        
+        # A failed write stops the writer; the journal is replayed on the next start
+        def fail(batch):
+            raise sqlite3.IntegrityError("UNIQUE constraint failed: orders.id")
+        ingest = OrderIngest(db_path)
+        ingest.start()
+        ingest._write_batch = fail
+        order = make_order('Takeaway', [coffee], 82.95, 3.95, 'UPI', timestamp='2026-03-01 12:00:00')
+        lost = ingest.submit(order)
+        ingest._thread.join(5)
+        try:
+            ingest.submit(order)
+            raise AssertionError("submit after a failed write must raise")
+        except IngestFailed:
+            pass
+        ingest.stop()
+        
+        ingest = OrderIngest(db_path)
+        assert ingest.start() == 1
+        ingest.stop()
+        with database.get_connection(db_path) as conn:
+            row = conn.execute("SELECT timestamp FROM orders WHERE id = ?", (lost,)).fetchone()
+        assert row == ('2026-03-01 12:00:00',), row
+        
+        # Only a busy/locked database is retried; other errors fail straight away
+        holder, waiter = sqlite3.connect(db_path), sqlite3.connect(db_path, timeout=0)
+        holder.execute("BEGIN EXCLUSIVE")
+        errors = []
+        for sql in ("BEGIN IMMEDIATE", "SELECT * FROM missing_table"):
+            try:
+                waiter.execute(sql)
+            except sqlite3.OperationalError as error:
+                errors.append(error)
+        holder.rollback()
+        holder.close()
+        waiter.close()
+        assert [_is_busy(error) for error in errors] == [True, False], errors
+        
+        # A journalled id held by a different order is refused, not skipped
+        with open(ingest.journal_path, 'w') as journal:
+            journal.write(json.dumps(dict(order, id=direct, payment_method='Card')) + '\n')
+        try:
+            OrderIngest(db_path).start()
+            raise AssertionError("conflicting journal entry must raise")
+        except IngestFailed:
+            pass
+        assert os.path.exists(ingest.journal_path)
+        
+        print(f"✅ Async ingest: ids {first}, {second} beside #{direct}; replayed #{lost}; conflict refused")
+    finally:
+        database.close_all()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_menu_import():
+    """Test bulk menu import from menu.csv with diffing"""
+    workdir = tempfile.mkdtemp(prefix='billing-menu-')
+    previous_path = database.get_default_path()
+    database.set_default_path(os.path.join(workdir, 'menu-test.db'))
+    try:
+        init_database()
+        with open('menu.csv', 'rb') as menu_file:
+            rows = menu_file.read().decode('utf-8').splitlines()
+        
+        # The shipped menu.csv matches the sample menu
+        diff = import_menu(io.BytesIO('\n'.join(rows).encode()), dry_run=True)
+        assert not any(diff), diff
+        
+        # Drop one item, reprice another and add a new one
+        edited = [row for row in rows if 'Coca Cola' not in row]
+        edited = [row.replace('Coffee,Beverage,79.0', 'Coffee,Beverage,89.0') for row in edited]
+        edited.append('99,Masala Chai,Beverage,39.0,5.0')
+        diff = import_menu(io.BytesIO('\n'.join(edited).encode()))
+        assert (len(diff.inserts), len(diff.updates), len(diff.retirements)) == (1, 1, 1), diff
+        
+        menu = get_menu_items().set_index('name')
+        assert 'Coca Cola' not in menu.index and menu.loc['Coffee', 'price'] == 89.0
+        assert len(menu) == len(rows) - 1
+        
+        print("✅ Menu import: 1 new, 1 changed, 1 removed in one transaction")
+    finally:
+        database.close_all()
+        database.set_default_path(previous_path)
+        invalidate_menu()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_menu_cache_external_writes():
+    """Test that menu writes from another connection reload the cache and ETag"""
+    workdir = tempfile.mkdtemp(prefix='billing-menu-cache-')
+    previous_path = database.get_default_path()
+    db_path = os.path.join(workdir, 'menu-cache.db')
+    database.set_default_path(db_path)
+    try:
+        init_database()
+        invalidate_menu()
+        menu = get_menu_items()
+        assert get_menu_items() is menu, "unchanged menu must come from the cache"
+        revision = menu_revision()
+        _, headers, _ = call_api('GET', '/menu')
+        
+        # Another process reprices an item without calling invalidate_menu()
+        other = sqlite3.connect(db_path)
+        with other:
+            other.execute("UPDATE menu SET price = 89.0 WHERE name = 'Coffee'")
+        other.close()
+        
+        assert menu_revision() != revision
+        prices = get_menu_items().set_index('name')['price']
+        assert prices['Coffee'] == 89.0, prices['Coffee']
+        status, _, _ = call_api('GET', '/menu', headers={'HTTP_IF_NONE_MATCH': headers['ETag']})
+        assert status == 200, status
+        
+        print("✅ Menu cache and /menu ETag follow a write from another connection")
+    finally:
+        database.close_all()
+        database.set_default_path(previous_path)
+        invalidate_menu()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_rerun_profiler():
+    """Test span and SQL timings collected for a profiled rerun"""
+    workdir = tempfile.mkdtemp(prefix='billing-profile-')
+    log_path = os.path.join(workdir, 'rerun_profile.log')
+    previous_path = database.get_default_path()
+    database.set_default_path(os.path.join(workdir, 'profile.db'))
+    configure(log_path=log_path)
+    
+    @profiled()
+    def load_menu():
+        invalidate_menu()
+        return get_menu_items()
+    
+    try:
+        init_database()
+        start_rerun(force=True)
+        load_menu()
+        with database.get_connection() as conn:
+            conn.execute("SELECT COUNT(*) FROM orders").fetchone()
+        profile = finish_rerun(widgets=3)
+        
+        report = profile.as_dict()
+        assert [span['name'] for span in report['spans']] == ['load_menu']
+        assert any('FROM orders' in entry['statement'] for entry in report['sql'])
+        assert report['widgets'] == 3 and report['total_ms'] >= report['sql_ms']
+        with open(log_path) as f:
+            assert json.loads(f.readline())['spans'][0]['name'] == 'load_menu'
+        
+        # Unsampled reruns record nothing
+        configure(sample_rate=0)
+        start_rerun()
+        load_menu()
+        assert finish_rerun() is None
+        
+        print(f"✅ Profiled rerun: {report['total_ms']:.2f} ms, {len(report['sql'])} statements")
+    finally:
+        configure(sample_rate=PROFILE_SAMPLE_RATE, log_path=PROFILE_LOG)
+        database.close_all()
+        database.set_default_path(previous_path)
+        invalidate_menu()
+        shutil.rmtree(workdir, ignore_errors=True)
 
 def main():
     """Run all tests"""
@@ -181,8 +812,22 @@ def main():
         ("Database Connection", test_database_connection),
         ("Menu Data", test_menu_data),
         ("Bill Calculation", test_bill_calculation),
+        ("Cart", test_cart),
         ("Sample Orders", test_sample_orders),
-        ("Reports Generation", test_reports)
+        ("Menu Item References", test_menu_item_references),
+        ("Schema Migrations", test_schema_migrations),
+        ("Reports Generation", test_reports),
+        ("Receipts", test_receipts),
+        ("HTTP API", test_api),
+        ("Sharded Reports", test_sharded_reports),
+        ("Out-of-order Rollups", test_rollups_out_of_order),
+        ("Rollups vs Full Scan", test_rollups_match_full_scan),
+        ("Local Day Boundaries", test_local_day_boundaries),
+        ("History Export", test_history_export),
+        ("Async Ingest", test_async_ingest),
+        ("Menu Import", test_menu_import),
+        ("Menu Cache", test_menu_cache_external_writes),
+        ("Rerun Profiler", test_rerun_profiler)
     ]
     
     passed = 0
@@ -190,10 +835,11 @@ def main():
     
     for test_name, test_func in tests:
         print(f"\n🔍 Running {test_name} test...")
-        if test_func():
+        try:
+            test_func()
             passed += 1
-        else:
-            print(f"❌ {test_name} test failed")
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e!r}")
     
     print("\n" + "=" * 50)
     print(f"📊 Test Results: {passed}/{total} tests passed")
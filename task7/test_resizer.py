@@ -4,7 +4,10 @@ import tempfile
 from pathlib import Path
 from PIL import Image
 
-from image_resizer import resize_image, batch_resize_images, create_sample_images
+from image_resizer import (
+    Rendition, apply_draft, batch_render_images, batch_resize_images, create_sample_images,
+    render_image, resize_image, scan_images,
+)
 
 
 class ImageResizerTestCase(unittest.TestCase):
@@ -53,6 +56,159 @@ class ImageResizerTestCase(unittest.TestCase):
             with Image.open(output_path) as img:
                 self.assertEqual(img.size, (75, 75))
 
+    def test_parallel_batch_results(self):
+        """Test the process pool returns one result per file, failures included."""
+        for i in range(5):
+            Image.new('RGB', (120, 90), color='green').save(
+                os.path.join(self.input_dir, f"extra{i}.png"), "PNG")
+        with open(os.path.join(self.input_dir, "broken.jpg"), "wb") as f:
+            f.write(b"not an image")
+        
+        results = batch_resize_images(self.input_dir, self.output_dir, (40, 30), workers=2, chunksize=2)
+        self.assertEqual(len(results), 7)
+        failed = [r for r in results if not r.ok]
+        self.assertEqual([Path(r.input_path).name for r in failed], ["broken.jpg"])
+        self.assertTrue(failed[0].error)
+        
+        # Unordered collection returns the same set of results
+        unordered = batch_resize_images(self.input_dir, self.output_dir, (40, 30),
+                                        workers=2, ordered=False, chunksize=1)
+        self.assertEqual(sorted(r.input_path for r in unordered), sorted(r.input_path for r in results))
+        with Image.open(os.path.join(self.output_dir, "extra3.png")) as img:
+            self.assertEqual(img.size, (40, 30))
+
+    def test_fast_downscale(self):
+        """Test draft()/reduce() downscaling keeps size and colour."""
+        big_jpeg = os.path.join(self.input_dir, "big.jpg")
+        big_png = os.path.join(self.input_dir, "big.png")
+        Image.new('RGB', (1600, 1200), color=(200, 30, 30)).save(big_jpeg, "JPEG")
+        Image.new('RGB', (1600, 1200), color=(30, 30, 200)).save(big_png, "PNG")
+        
+        # JPEGs are decoded at a reduced scale, never below gap x target
+        with Image.open(big_jpeg) as img:
+            apply_draft(img, (100, 75), reducing_gap=2.0)
+            self.assertEqual(img.size, (200, 150))
+        
+        for source in (big_jpeg, big_png):
+            for gap in (None, 1.0, 3.0):
+                output_path = os.path.join(self.output_dir, f"out-{gap}-{Path(source).name}")
+                result = resize_image(source, output_path, (100, 75), reducing_gap=gap)
+                self.assertTrue(result.ok, result.error)
+                with Image.open(output_path) as img:
+                    self.assertEqual(img.size, (100, 75))
+                    expected = (200, 30, 30) if source == big_jpeg else (30, 30, 200)
+                    pixel = img.convert('RGB').getpixel((50, 37))
+                    self.assertTrue(all(abs(a - b) < 12 for a, b in zip(pixel, expected)), pixel)
+
+    def test_fast_downscale_other_modes(self):
+        """Test palette, bilevel and 16-bit sources, which reduce() does not accept."""
+        gradient = Image.linear_gradient('L').resize((800, 600))
+        sources = {
+            'palette.png': gradient.convert('RGB').convert('P'),
+            'bilevel.png': gradient.convert('1'),
+            'deep.png': gradient.convert('I').point(lambda v: v * 256),
+        }
+        for name, img in sources.items():
+            img.save(os.path.join(self.input_dir, name), "PNG")
+        
+        renditions = [Rendition('small', (100, 75)), Rendition('tiny', (40, 30), fit='cover')]
+        for name in sources:
+            outputs = [(r, os.path.join(self.output_dir, f"{r.name}-{name}")) for r in renditions]
+            results = render_image(os.path.join(self.input_dir, name), outputs)
+            self.assertTrue(all(r.ok for r in results), results)
+            for (rendition, output_path) in outputs:
+                with Image.open(output_path) as img:
+                    self.assertEqual(img.size, rendition.size, output_path)
+
+    def test_renditions_from_one_decode(self):
+        """Test several named renditions with different fit modes, formats and quality."""
+        Image.new('RGBA', (1200, 600), color=(0, 128, 0, 255)).save(
+            os.path.join(self.input_dir, "wide.png"), "PNG")
+        renditions = [
+            Rendition('thumbnail', (64, 64), format='JPEG', quality=70, fit='cover'),
+            Rendition('medium', (300, 300), fit='contain'),
+            Rendition('large', (800, 400)),
+        ]
+        results = batch_render_images(self.input_dir, self.output_dir, renditions, workers=1)
+        self.assertEqual(len(results), 6)
+        self.assertTrue(all(r.ok for r in results), results)
+        
+        expected = {
+            'thumbnail/wide.jpeg': (64, 64),
+            'medium/wide.png': (300, 150),
+            'large/wide.png': (800, 400),
+            'thumbnail/test.jpeg': (64, 64),
+            'medium/test.jpg': (300, 300),
+        }
+        for name, size in expected.items():
+            with Image.open(os.path.join(self.output_dir, name)) as img:
+                self.assertEqual(img.size, size, name)
+        
+        # Outputs come back in the order they were asked for
+        outputs = [(r, os.path.join(self.output_dir, f"{r.name}-single.png")) for r in renditions[1:]]
+        results = render_image(os.path.join(self.input_dir, "wide.png"), outputs)
+        self.assertEqual([r.output_path for r in results], [path for _, path in outputs])
+        
+        with self.assertRaises(ValueError):
+            Rendition('bad', (10, 10), fit='squash')
+
+    def test_incremental_manifest(self):
+        """Test that incremental runs only re-render new or changed sources."""
+        Image.new('RGB', (200, 150), color='blue').save(os.path.join(self.input_dir, "test2.png"), "PNG")
+        renditions = [Rendition('small', (40, 30)), Rendition('tiny', (20, 15))]
+        
+        def run():
+            results = batch_render_images(self.input_dir, self.output_dir, renditions,
+                                          workers=1, incremental=True)
+            self.assertTrue(all(r.ok for r in results), results)
+            return sorted(os.path.relpath(r.output_path, self.output_dir) for r in results if not r.skipped)
+        
+        self.assertEqual(len(run()), 4)
+        self.assertEqual(run(), [])
+        
+        # Touched but identical: rehashed and skipped
+        stamp = os.path.getmtime(self.test_image_path) + 10
+        os.utime(self.test_image_path, (stamp, stamp))
+        self.assertEqual(run(), [])
+        
+        # New content, a new file and a deleted output are re-rendered
+        Image.new('RGB', (100, 100), color='green').save(self.test_image_path, "JPEG")
+        Image.new('RGB', (60, 60), color='white').save(os.path.join(self.input_dir, "new.png"), "PNG")
+        os.remove(os.path.join(self.output_dir, "tiny", "test2.png"))
+        self.assertEqual(run(), [
+            os.path.join("small", "new.png"), os.path.join("small", "test.jpg"),
+            os.path.join("tiny", "new.png"), os.path.join("tiny", "test.jpg"),
+            os.path.join("tiny", "test2.png"),
+        ])
+        
+        # A different spec for the same name is a different output
+        renditions[0] = Rendition('small', (40, 30), fit='contain')
+        self.assertEqual(len(run()), 3)
+
+    def test_recursive_scan_mirrors_folders(self):
+        """Test the scanner finds nested, mixed-case files and mirrors folders."""
+        nested = os.path.join(self.input_dir, "shoes", "red")
+        os.makedirs(nested)
+        Image.new('RGB', (80, 60), color='red').save(os.path.join(nested, "Boot.Jpg"), "JPEG")
+        Image.new('RGB', (80, 60), color='red').save(os.path.join(self.input_dir, "shoes", "no_extension"), "PNG")
+        with open(os.path.join(self.input_dir, "notes.txt"), "w") as f:
+            f.write("not an image")
+        
+        found = sorted(str(rel) for _, rel in scan_images(self.input_dir))
+        self.assertEqual(found, [os.path.join("shoes", "red", "Boot.Jpg"), "test.jpg"])
+        sniffed = sorted(str(rel) for _, rel in scan_images(self.input_dir, sniff=True))
+        self.assertEqual(sniffed, [os.path.join("shoes", "no_extension"),
+                                   os.path.join("shoes", "red", "Boot.Jpg"), "test.jpg"])
+        self.assertEqual([str(rel) for _, rel in scan_images(self.input_dir, recursive=False)], ["test.jpg"])
+        
+        # An output folder inside the input folder is not scanned again
+        output_dir = os.path.join(self.input_dir, "resized")
+        for _ in range(2):
+            results = batch_resize_images(self.input_dir, output_dir, (40, 30), workers=1)
+            self.assertEqual(len(results), 2)
+        with Image.open(os.path.join(output_dir, "shoes", "red", "Boot.Jpg")) as img:
+            self.assertEqual(img.size, (40, 30))
+
     def test_format_conversion(self):
         """Test converting image format."""
         output_path = os.path.join(self.output_dir, "test.png")